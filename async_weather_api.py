@@ -0,0 +1,187 @@
+"""
+Asyncio weather API module
+Non-blocking counterpart to WeatherAPI for use inside event loops
+"""
+
+import asyncio
+import time
+import config
+import json_codec
+import metrics
+from cities import group_cities
+from weather_client import WeatherClient, Reply
+from config import TIMEOUT, ASYNC_MAX_IN_FLIGHT
+from weather_api import WeatherAPI
+
+
+def _retryable_errors():
+    """Exception types treated as transient network failures"""
+    try:
+        import aiohttp
+    except ImportError:
+        return (asyncio.TimeoutError, OSError)
+    return (asyncio.TimeoutError, OSError, aiohttp.ClientError)
+
+
+class AiohttpTransport:
+    """Async transport over an aiohttp session with a cap on in-flight requests"""
+    
+    def __init__(self, session=None, max_in_flight=ASYNC_MAX_IN_FLIGHT):
+        """
+        Initialize the transport
+        
+        Args:
+            session (aiohttp.ClientSession): Session to send requests on
+                (created on first use if not given)
+            max_in_flight (int): Maximum concurrent requests
+        """
+        self.max_in_flight = max_in_flight
+        self.retry_on = _retryable_errors()
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = None
+    
+    async def close(self):
+        """Close the underlying session if this transport created it"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _get_session(self):
+        """Create the aiohttp session lazily so it binds to the running loop"""
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("AsyncWeatherAPI requires aiohttp (pip install aiohttp)")
+            
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+            )
+        return self._session
+    
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+    
+    async def get(self, url, params):
+        """
+        Send one GET request
+        
+        Args:
+            url (str): Endpoint URL
+            params (dict): Query parameters
+            
+        Returns:
+            Reply: Status, decoded body and Retry-After
+        """
+        # The semaphore and response are released by their context managers,
+        # so a timeout or task cancellation never leaks a slot or connection
+        async with self._get_semaphore():
+            return await asyncio.wait_for(self._send(url, params), TIMEOUT)
+    
+    async def _send(self, url, params):
+        start = time.perf_counter()
+        async with self._get_session().get(url, params=params) as response:
+            metrics.observe_stage('ttfb', time.perf_counter() - start)
+            if response.status >= 400:
+                return Reply(response.status, None, response.headers.get('Retry-After'))
+            return Reply(response.status, json_codec.loads(await response.read()), None)
+
+
+class AsyncWeatherAPI(WeatherClient):
+    """Class to handle weather API interactions from asyncio code"""
+    
+    get_weather_emoji = WeatherAPI.get_weather_emoji
+    
+    def __init__(self, api_key=None, session=None, max_in_flight=ASYNC_MAX_IN_FLIGHT, cache=None,
+                 retry=None, breaker=None, store=None, transport=None):
+        """
+        Initialize AsyncWeatherAPI with API key
+        
+        Args:
+            api_key (str): OpenWeatherMap API key (defaults to config.API_KEY)
+            session (aiohttp.ClientSession): Session to send requests on
+                (created on first use if not given)
+            max_in_flight (int): Maximum concurrent lookups
+            cache (TTLCache): Response cache (defaults to the shared cache;
+                pass False to disable caching)
+            retry (RetryPolicy): Backoff for transient failures (defaults from config)
+            breaker (CircuitBreaker): Breaker guarding the upstream
+                (defaults to the shared OpenWeatherMap breaker)
+            store (ObservationStore): History to record fetched observations in
+                (defaults to the configured store, if any; pass False to disable)
+            transport: Async or replay transport (see weather_client); overrides session
+        """
+        super().__init__(api_key, transport or AiohttpTransport(session, max_in_flight),
+                         cache, retry, breaker, store)
+        self.max_in_flight = max_in_flight
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Close the underlying transport if it holds a session"""
+        close = getattr(self.transport, 'close', None)
+        if close is not None:
+            await close()
+    
+    async def fetch_current_weather(self, city):
+        """
+        Fetch current weather for a city
+        
+        Args:
+            city (str): City name
+            
+        Returns:
+            WeatherRecord: Parsed weather data (also readable as a dict)
+            
+        Raises:
+            ValueError: If city not found or API error
+            asyncio.TimeoutError: If the lookup exceeds config.TIMEOUT
+            aiohttp.ClientError: If network error
+        """
+        return await self.fetch_current_async(city)
+    
+    async def fetch_many(self, cities):
+        """
+        Fetch current weather for many cities concurrently
+        
+        Concurrency is capped by max_in_flight, and lookups queue for
+        rate-limit budget (config.RATE_LIMIT_BATCH_MAX_WAIT) rather than
+        failing partway through, and history is written in batches off the
+        event loop. A failing city does not fail the batch; its exception is
+        returned in the errors dict instead.
+        
+        Args:
+            cities (iterable): City names; spellings of the same city (case,
+                whitespace, Unicode composition) are fetched once
+            
+        Returns:
+            tuple: (results, errors) dicts keyed by city name as given
+        """
+        groups = list(group_cities(cities).values())
+        max_wait = config.RATE_LIMIT_BATCH_MAX_WAIT
+        self._begin_batch()
+        try:
+            outcomes = await asyncio.gather(
+                *(self.fetch_current_async(names[0], max_wait) for names in groups),
+                return_exceptions=True
+            )
+        finally:
+            self._end_batch()
+            await self.flush_history_async()
+        
+        results = {}
+        errors = {}
+        for names, outcome in zip(groups, outcomes):
+            target = errors if isinstance(outcome, Exception) else results
+            for name in names:
+                target[name] = outcome
+        
+        return results, errors
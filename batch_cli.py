@@ -0,0 +1,236 @@
+"""
+Batch CLI module
+Non-interactive lookups streamed from a file or stdin to NDJSON or CSV
+
+Usage:
+    python project.py --batch cities.txt --format csv > weather.csv
+    cat cities.txt | python project.py --batch - --reports
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import config
+
+
+# Output columns, in CSV order
+FIELDS = ('query', 'ok', 'city', 'country', 'temp', 'feels_like', 'humidity', 'pressure',
+          'wind_speed', 'description', 'icon', 'dt', 'report', 'error')
+
+
+def _positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def _output_file(path):
+    """argparse type opening the output for writing ('-' is stdout)"""
+    if path == '-':
+        return sys.stdout
+    try:
+        return open(path, 'w', encoding='utf-8', newline='')
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"can't open '{path}': {e.strerror}")
+
+
+def parse_args(argv):
+    """
+    Parse batch command-line arguments
+    
+    Args:
+        argv (list): Arguments after the program name
+        
+    Returns:
+        argparse.Namespace: Parsed options; input and output are open files
+        
+    Raises:
+        SystemExit: With a usage message if the arguments are invalid or a
+            file can't be opened
+    """
+    parser = argparse.ArgumentParser(
+        prog='project.py --batch',
+        description="Fetch weather for a stream of city names, one per line."
+    )
+    parser.add_argument('--batch', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('input', nargs='?', default='-',
+                        type=argparse.FileType('r', encoding='utf-8'),
+                        help="file with one city per line, or - for stdin (default)")
+    parser.add_argument('-f', '--format', choices=('ndjson', 'csv'), default='ndjson',
+                        help="output format (default: ndjson)")
+    parser.add_argument('-o', '--output', default='-', type=_output_file,
+                        help="output file, or - for stdout (default)")
+    parser.add_argument('-w', '--workers', type=_positive_int, default=config.BATCH_WORKERS,
+                        help=f"concurrent lookups (default: {config.BATCH_WORKERS})")
+    parser.add_argument('--reports', action='store_true',
+                        help="also write an HTML report per city (never opens a browser)")
+    parser.add_argument('--metrics-file', default=None,
+                        help="write per-stage timings in Prometheus text format here "
+                             "(default: $WEATHERWISE_METRICS_FILE)")
+    return parser.parse_args(argv)
+
+
+def read_cities(stream):
+    """
+    Yield city names from a line stream, skipping blanks and # comments
+    
+    Args:
+        stream: Iterable of text lines
+        
+    Yields:
+        str: Stripped city name
+    """
+    for line in stream:
+        city = line.strip()
+        if city and not city.startswith('#'):
+            yield city
+
+
+def result_row(query, weather_data=None, error=None, report=None):
+    """
+    Flatten one lookup outcome into an output row
+    
+    Args:
+        query (str): City name as given in the input
+        weather_data (WeatherRecord): Result, if the lookup succeeded
+        error (Exception): Failure, if it did not
+        report (str): Report path, if one was written
+        
+    Returns:
+        dict: Row keyed by FIELDS (missing values omitted)
+    """
+    if weather_data is None:
+        return {'query': query, 'ok': False, 'error': str(error)}
+    
+    row = {'query': query, 'ok': True}
+    row.update(weather_data.to_fields())
+    if report:
+        row['report'] = report
+    return row
+
+
+class NDJSONWriter:
+    """Writes one JSON object per line"""
+    
+    def __init__(self, out):
+        self.out = out
+    
+    def write(self, row):
+        self.out.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.out.flush()
+
+
+class CSVWriter:
+    """Writes rows under a fixed header"""
+    
+    def __init__(self, out):
+        self.out = out
+        self.writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+    
+    def write(self, row):
+        self.writer.writerow(row)
+        self.out.flush()
+
+
+def run_batch(lines, writer, workers=config.BATCH_WORKERS, reports=False, api=None):
+    """
+    Validate, fetch and emit results for a stream of city names
+    
+    Cities are pulled from lines only as fetch slots free up and each result
+    is written as soon as it arrives, so memory use does not grow with the
+    input size.
+    
+    Args:
+        lines: Iterable of input lines
+        writer: NDJSONWriter or CSVWriter
+        workers (int): Concurrent lookups
+        reports (bool): Write a headless HTML report per successful city
+        api (WeatherAPI): Client to use (defaults to a new one)
+        
+    Returns:
+        dict: Counts of 'ok' and 'failed' lookups
+    """
+    from cities import is_valid_city
+    from weather_api import WeatherAPI
+    
+    if api is None:
+        api = WeatherAPI()
+    if reports:
+        from report_generator import create_html_report
+    
+    counts = {'ok': 0, 'failed': 0}
+    
+    def valid_cities():
+        # Invalid names are reported inline and never reach the API
+        for city in read_cities(lines):
+            if is_valid_city(city):
+                yield city
+            else:
+                counts['failed'] += 1
+                writer.write(result_row(city, error="Invalid city name"))
+    
+    for city, weather_data, error in api.iter_many(valid_cities(), max_workers=workers):
+        if error is not None:
+            counts['failed'] += 1
+            writer.write(result_row(city, error=error))
+            continue
+        
+        report = create_html_report(weather_data, open_browser=False) if reports else None
+        counts['ok'] += 1
+        writer.write(result_row(city, weather_data, report=report))
+    
+    return counts
+
+
+def main(argv=None):
+    """
+    Batch entry point
+    
+    Args:
+        argv (list): Arguments after the program name (defaults to sys.argv[1:])
+        
+    Returns:
+        int: Exit status: 0 if every lookup succeeded, 1 otherwise
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    
+    # Resolve the API key up front so its setup warning goes to stderr, not the data stream
+    with contextlib.redirect_stdout(sys.stderr):
+        config.API_KEY
+    
+    metrics_file = args.metrics_file or config.METRICS_FILE
+    if metrics_file:
+        import metrics
+        metrics.enable()
+    
+    source, out = args.input, args.output
+    try:
+        writer = CSVWriter(out) if args.format == 'csv' else NDJSONWriter(out)
+        counts = run_batch(source, writer, workers=args.workers, reports=args.reports)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    
+    if metrics_file:
+        metrics.write_prometheus(metrics_file)
+    
+    from rate_limit import get_rate_limiter
+    
+    waited = get_rate_limiter(config.API_KEY).stats()['waited']
+    paced = f" (waited {waited:.0f}s for rate limit budget)" if waited >= 1 else ""
+    print(f"{counts['ok']} succeeded, {counts['failed']} failed{paced}", file=sys.stderr)
+    return 0 if counts['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
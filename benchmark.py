@@ -0,0 +1,322 @@
+"""
+Benchmark module
+Throughput, latency and allocation numbers for lookups and report rendering,
+measured against a local fake OpenWeatherMap server
+
+Usage:
+    python benchmark.py --requests 2000 --concurrency 20 --latency 0.005 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import config
+import json_codec
+import metrics
+from fake_server import FakeWeatherServer, weather_payload
+from models import WeatherRecord
+
+
+_UNSET = object()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of already sorted values
+    
+    Args:
+        sorted_values (list): Values in ascending order
+        fraction (float): Percentile as a fraction, e.g. 0.95
+        
+    Returns:
+        float: The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _run(fn, items, concurrency):
+    """
+    Call fn on every item from a thread pool, timing each call
+    
+    Returns:
+        tuple: (latencies in seconds, error count, wall-clock seconds)
+    """
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            fn(item)
+            failed = False
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, items))
+    elapsed = time.perf_counter() - start
+    return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), elapsed
+
+
+def _allocations(fn, items):
+    """
+    Trace memory while calling fn on each item in turn
+    
+    Returns:
+        dict: Peak and retained bytes, and blocks retained per call
+    """
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        for item in items:
+            try:
+                fn(item)
+            except Exception:
+                pass
+        current, peak = tracemalloc.get_traced_memory()
+        retained_blocks = sys.getallocatedblocks() - blocks
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'peak_bytes': peak - baseline,
+        'retained_bytes': current - baseline,
+        'retained_blocks_per_op': retained_blocks / max(len(items), 1)
+    }
+
+
+def measure(name, fn, items, concurrency=1, alloc_items=None):
+    """
+    Benchmark one operation
+    
+    Args:
+        name (str): Scenario name used as the result key
+        fn (callable): Operation taking one item
+        items (list): Inputs, one call each
+        concurrency (int): Worker threads driving the calls
+        alloc_items (list): Inputs traced (sequentially) for allocation
+            figures (defaults to the first 50 items)
+        
+    Returns:
+        dict: ops, errors, seconds, ops_per_sec, latency_ms percentiles, allocations
+    """
+    latencies, errors, elapsed = _run(fn, items, concurrency)
+    latencies.sort()
+    
+    return {
+        'name': name,
+        'ops': len(items),
+        'errors': errors,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 4),
+        'ops_per_sec': round(len(items) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0
+        },
+        'allocations': _allocations(fn, items[:50] if alloc_items is None else alloc_items)
+    }
+
+
+@contextmanager
+def pointed_at(server, retry_max_delay=1.0):
+    """
+    Point the clients at a fake server for the duration of a benchmark
+    
+    Rate limiting is switched off so the numbers measure the client, not the
+    configured quota. The disk cache, history store and city list are
+    switched off too, so a run never touches the user's files: the shared
+    cache, store, index, clients, limiters and breakers are rebuilt (not
+    cleared) on the way in and out.
+    
+    Args:
+        server (FakeWeatherServer): Running server
+        retry_max_delay (float): Cap on backoff waits during the run
+    """
+    from cache import reset_default_cache
+    from city_index import reset_default_index
+    from observation_store import reset_default_store
+    from rate_limit import reset_rate_limiters
+    from retry import reset_circuit_breakers
+    from weather_client import reset_default_clients
+    
+    overrides = {
+        'API_KEY': 'benchmark',
+        'BASE_URL': server.weather_url,
+        'GROUP_URL': server.group_url,
+        'FORECAST_URL': server.forecast_url,
+        'RATE_LIMIT_PER_MINUTE': 0,
+        'RATE_LIMIT_PER_DAY': 0,
+        'RETRY_MAX_DELAY': retry_max_delay,
+        'HEADLESS': True,
+        'DISK_CACHE_PATH': '',
+        'HISTORY_DB_PATH': '',
+        'CITY_LIST_PATH': ''
+    }
+    # Read the module dict directly so lazily resolved settings stay unresolved
+    saved = {name: vars(config).get(name, _UNSET) for name in overrides}
+    
+    def reset():
+        reset_default_cache()
+        reset_default_store()
+        reset_default_index()
+        reset_rate_limiters()
+        reset_circuit_breakers()
+        reset_default_clients()
+    
+    vars(config).update(overrides)
+    reset()
+    try:
+        yield server
+    finally:
+        for name, value in saved.items():
+            if value is _UNSET:
+                vars(config).pop(name, None)
+            else:
+                vars(config)[name] = value
+        reset()
+
+
+def run_benchmarks(requests=500, concurrency=10, reports=200, latency=0.0, error_rate=0.0,
+                   throttle_every=0, retry_after=0, seed=1):
+    """
+    Run every benchmark scenario against a fresh fake server
+    
+    Args:
+        requests (int): Lookups per lookup scenario
+        concurrency (int): Worker threads for the lookup scenarios
+        reports (int): Reports rendered in the report scenario
+        latency (float): Server delay per request, in seconds
+        error_rate (float): Fraction of requests the server fails with a 500
+        throttle_every (int): Server answers every Nth request with a 429 (0 disables)
+        retry_after (int): Retry-After seconds sent with the 429s
+        seed (int): Seed for the server's error draws
+        
+    Returns:
+        dict: {'meta': {...}, 'results': {scenario: figures},
+            'stages': {stage: count and mean_ms across all scenarios}}
+    """
+    from cache import get_default_cache
+    from city_index import CityIndex
+    from project import get_weather_data
+    from report_generator import create_html_report
+    from weather_api import WeatherAPI
+    
+    results = {}
+    was_enabled = metrics.enabled
+    metrics.reset()
+    metrics.enable()
+    with FakeWeatherServer(latency, error_rate, throttle_every, retry_after, seed) as server, \
+            pointed_at(server):
+        # Distinct names so every lookup goes to the server despite the shared cache
+        cities = [f"Bench City {i}" for i in range(requests)]
+        results['get_weather_data'] = measure('get_weather_data', get_weather_data, cities, concurrency,
+                                              alloc_items=[f"Traced City {i}" for i in range(50)])
+        
+        api = WeatherAPI(cache=False, store=False)
+        results['fetch_current_weather'] = measure(
+            'fetch_current_weather', api.fetch_current_weather, cities, concurrency)
+        results['fetch_forecast'] = measure('fetch_forecast', api.fetch_forecast, cities, concurrency)
+        
+        # Same cities by name and, through an index, by ID in group requests;
+        # upstream_requests counts what each costs against the API quota
+        index = CityIndex((city_id, city, 'XX') for city_id, city in enumerate(cities, 1))
+        batches = [cities[i:i + 100] for i in range(0, len(cities), 100)]
+        for name, city_index in (('fetch_many', False), ('fetch_many_grouped', index)):
+            get_default_cache().clear()
+            api = WeatherAPI(store=False, city_index=city_index)
+            sent = sum(server.statuses.values())
+            results[name] = measure(name, api.fetch_many, batches)
+            results[name]['upstream_requests'] = sum(server.statuses.values()) - sent
+        
+        get_default_cache().clear()
+        api = WeatherAPI(store=False)
+        api.fetch_many(cities[:10])
+        results['fetch_current_weather_cached'] = measure(
+            'fetch_current_weather_cached', api.fetch_current_weather, cities[:10] * (requests // 10 or 1))
+        
+        records = [WeatherRecord.from_api(weather_payload(f"Report City {i}")) for i in range(reports)]
+        with tempfile.TemporaryDirectory() as reports_dir:
+            results['create_html_report'] = measure(
+                'create_html_report',
+                lambda record: create_html_report(record, open_browser=False, reports_dir=reports_dir),
+                records
+            )
+        results['create_html_report']['reports_per_sec'] = results['create_html_report']['ops_per_sec']
+        
+        server_statuses = dict(server.statuses)
+    
+    metrics.enable(was_enabled)
+    stages = {
+        key.split('"')[1]: {'count': figures['count'],
+                            'mean_ms': round(figures['sum'] / figures['count'] * 1000, 3)}
+        for key, figures in metrics.snapshot()['histograms'].items()
+        if key.startswith(metrics.STAGE_METRIC)
+    }
+    
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'json_backend': json_codec.BACKEND,
+            'server': {'latency': latency, 'error_rate': error_rate,
+                       'throttle_every': throttle_every, 'retry_after': retry_after,
+                       'statuses': {str(status): count for status, count in sorted(server_statuses.items())}}
+        },
+        'results': results,
+        'stages': stages
+    }
+
+
+def parse_args(argv):
+    """Parse benchmark command-line arguments"""
+    parser = argparse.ArgumentParser(prog="benchmark.py", description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--requests', type=int, default=500, help="lookups per scenario")
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help="worker threads")
+    parser.add_argument('-r', '--reports', type=int, default=200, help="reports to render")
+    parser.add_argument('--latency', type=float, default=0.0, help="server delay per request (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 500 answers")
+    parser.add_argument('--throttle-every', type=int, default=0, help="send a 429 every N requests")
+    parser.add_argument('--retry-after', type=int, default=0, help="Retry-After sent with 429s")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', default='-', help="JSON results file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the benchmarks and write the results as JSON
+    
+    Args:
+        argv (list): Arguments after the program name (defaults to sys.argv[1:])
+        
+    Returns:
+        int: Exit status
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    report = run_benchmarks(args.requests, args.concurrency, args.reports, args.latency,
+                            args.error_rate, args.throttle_every, args.retry_after, args.seed)
+    text = json.dumps(report, indent=2)
+    
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Response cache module
+In-memory TTL cache with LRU eviction for parsed weather data
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import config
+from cities import city_key
+
+
+def make_key(city, units='metric'):
+    """
+    Build a cache key from a city name and unit system
+    
+    Args:
+        city (str): City name as typed by the user
+        units (str): OpenWeatherMap unit system
+        
+    Returns:
+        tuple: Normalized (city, units) key; see cities.city_key
+    """
+    return (city_key(city), units)
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire after a TTL, evicting LRU first"""
+    
+    def __init__(self, ttl=None, max_entries=None, clock=time.monotonic):
+        """
+        Initialize TTLCache
+        
+        Args:
+            ttl (float): Seconds an entry stays fresh (defaults to config.CACHE_TTL)
+            max_entries (int): Maximum entries kept (defaults to config.CACHE_MAX_ENTRIES)
+            clock (callable): Monotonic time source, injectable for tests
+        """
+        self.ttl = config.CACHE_TTL if ttl is None else ttl
+        self.max_entries = config.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """
+        Look up a fresh entry
+        
+        Args:
+            key: Cache key (see make_key)
+            
+        Returns:
+            The cached value (treat as read-only), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting the least recently used entries if full
+        
+        Args:
+            key: Cache key (see make_key)
+            value: Value to cache
+            ttl (float): Override for this entry's lifetime in seconds
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+    
+    def stats(self):
+        """
+        Report cache effectiveness
+        
+        Returns:
+            dict: Counts for 'hits', 'misses', 'evictions', 'expirations' and 'size'
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries)
+            }
+
+
+class TieredCache:
+    """Memory cache in front of a persistent cache shared between processes"""
+    
+    def __init__(self, memory, disk):
+        """
+        Initialize TieredCache
+        
+        Args:
+            memory (TTLCache): Fast per-process tier
+            disk (DiskCache): Persistent tier
+        """
+        self.memory = memory
+        self.disk = disk
+    
+    def get(self, key):
+        """
+        Look up a fresh entry in memory, then on disk
+        
+        Args:
+            key: Cache key (see make_key)
+            
+        Returns:
+            The cached value, or None on a miss
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        return self.disk_get(key)
+    
+    def disk_get(self, key):
+        """
+        Look up a fresh entry on disk only, promoting it to memory
+        
+        Async callers run this (it blocks on SQLite) from a worker thread
+        after a memory miss.
+        
+        Args:
+            key: Cache key (see make_key)
+            
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self.disk.get_entry(key)
+        if entry is None:
+            return None
+        
+        # Promote with the remaining lifetime so memory never outlives disk
+        value, fetched_at = entry
+        remaining = fetched_at + self.disk.ttl - self.disk._clock()
+        self.memory.set(key, value, ttl=remaining)
+        return value
+    
+    def set(self, key, value):
+        """
+        Store a value in both tiers
+        
+        Args:
+            key: Cache key (see make_key)
+            value: Value to cache
+        """
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+    
+    def clear(self):
+        """Drop all entries from both tiers"""
+        self.memory.clear()
+        self.disk.clear()
+    
+    def stats(self):
+        """
+        Report cache effectiveness per tier
+        
+        Returns:
+            dict: 'memory' and 'disk' statistics
+        """
+        return {'memory': self.memory.stats(), 'disk': self.disk.stats()}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Get the process-wide cache shared by get_weather_data and WeatherAPI
+    
+    When config.DISK_CACHE_PATH is set, results are also persisted there so
+    other processes (and later CLI runs) can reuse them.
+    
+    Returns:
+        TTLCache or TieredCache: Shared cache built from config settings
+    """
+    global _default_cache
+    
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                if config.DISK_CACHE_PATH:
+                    from disk_cache import DiskCache
+                    _default_cache = TieredCache(TTLCache(), DiskCache())
+                else:
+                    _default_cache = TTLCache()
+    return _default_cache
+
+
+def reset_default_cache():
+    """Forget the shared cache (without clearing it) so it is rebuilt from config"""
+    global _default_cache
+    
+    with _default_lock:
+        _default_cache = None
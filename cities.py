@@ -0,0 +1,127 @@
+"""
+City names module
+Unicode-aware validation, normalization and de-duplication of city names
+"""
+
+import re
+import unicodedata
+
+
+# Separators allowed between the letters of a name
+_SEPARATORS = re.compile(r"[\s\-'’.]+")
+
+
+def _letters_and_marks(letters):
+    """Slow path: also accept combining marks (e.g. Devanagari vowel signs)"""
+    return all(c.isalpha() or unicodedata.category(c)[0] == 'M' for c in letters)
+
+
+def is_valid_city(name):
+    """
+    Check that a city name could be a real place
+    
+    Letters from any script, spaces, hyphens, apostrophes and periods are
+    allowed, e.g. "São Paulo", "Zürich", "O'Fallon", "St. Louis", "東京".
+    
+    Args:
+        name (str): City name as typed
+        
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    if not name or len(name.strip()) < 2:
+        return False
+    if name.isalpha():
+        return True
+    # str.isalpha covers every script in C and rejects digits of any kind
+    # (including "²"), underscores and symbols
+    letters = _SEPARATORS.sub('', name)
+    return letters.isalpha() or (letters != '' and _letters_and_marks(letters))
+
+
+def normalize_city(name):
+    """
+    Canonical display form: NFC-composed, whitespace collapsed and trimmed
+    
+    Args:
+        name (str): City name as typed
+        
+    Returns:
+        str: e.g. "  São   Paulo " -> "São Paulo"
+    """
+    if not name.isascii():
+        name = unicodedata.normalize('NFC', name)
+    return ' '.join(name.split())
+
+
+def city_key(name):
+    """
+    Canonical lookup key shared by caches, coalescing and history
+    
+    Spellings that differ only in case, whitespace or Unicode composition
+    map to the same key.
+    
+    Args:
+        name (str): City name as typed
+        
+    Returns:
+        str: Case-folded, normalized name, e.g. "são paulo"
+    """
+    return _fold(normalize_city(name))
+
+
+def _fold(display):
+    if display.isascii():
+        return display.lower()
+    # casefold can decompose (e.g. "İ"), so compose again afterwards
+    return unicodedata.normalize('NFC', display.casefold())
+
+
+def normalize_cities(names):
+    """
+    Validate, normalize and de-duplicate a list of city names in one pass
+    
+    Args:
+        names (iterable): City names as typed
+        
+    Returns:
+        tuple: (cities, invalid) where cities maps each canonical key to the
+            first display name seen for it (input order), and invalid lists
+            the distinct rejected names as given
+    """
+    cities = {}
+    invalid = []
+    seen = set()
+    
+    for name in names:
+        # Repeats of an exact spelling cost one set lookup
+        if name in seen:
+            continue
+        seen.add(name)
+        if not is_valid_city(name):
+            invalid.append(name)
+            continue
+        display = normalize_city(name)
+        key = _fold(display)
+        if key not in cities:
+            cities[key] = display
+    
+    return cities, invalid
+
+
+def group_cities(names):
+    """
+    Group spellings of the same city under its canonical key
+    
+    Args:
+        names (iterable): City names as given
+        
+    Returns:
+        dict: canonical key -> list of distinct spellings, in input order
+    """
+    groups = {}
+    for name in names:
+        spellings = groups.setdefault(city_key(name), [])
+        if name not in spellings:
+            spellings.append(name)
+    return groups
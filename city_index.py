@@ -0,0 +1,150 @@
+"""
+City index module
+Offline name-to-ID lookup built from an OpenWeatherMap city list
+"""
+
+import csv
+import gzip
+import io
+import json
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from cities import city_key
+import config
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+class _Keys:
+    """Read-only sequence over keys packed into one string, for bisect"""
+    
+    __slots__ = ('blob', 'offsets')
+    
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+
+class CityIndex:
+    """
+    Sorted, packed index of city names to OpenWeatherMap city IDs
+    
+    Entries are sorted by (canonical name, country). Names are stored
+    back-to-back in one string with an offset array, IDs in an array('q')
+    and country codes as one fixed-width string, so 200k cities take a few
+    MB instead of a dict of objects. Lookups bisect the packed keys.
+    """
+    
+    __slots__ = ('_keys', '_ids', '_countries')
+    
+    def __init__(self, entries):
+        """
+        Build the index
+        
+        Args:
+            entries (iterable): (city_id, name, country) tuples
+        """
+        rows = sorted((city_key(name), (country or '').upper()[:2].ljust(2), int(city_id))
+                      for city_id, name, country in entries)
+        
+        offsets = array('L', [0])
+        total = 0
+        for key, _, _ in rows:
+            total += len(key)
+            offsets.append(total)
+        
+        self._keys = _Keys(''.join(key for key, _, _ in rows), offsets)
+        self._ids = array('q', [city_id for _, _, city_id in rows])
+        self._countries = ''.join(country for _, country, _ in rows)
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a city list file
+        
+        Accepts OpenWeatherMap's city.list.json (a list of objects with id,
+        name and country) or a CSV with id,name,country columns, either one
+        optionally gzip-compressed.
+        
+        Args:
+            path (str): City list file
+            
+        Returns:
+            CityIndex: Index over the file's cities
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        base = path[:-3] if path.endswith('.gz') else path
+        
+        with opener(path, 'rb') as f:
+            data = f.read()
+        
+        if base.endswith('.json'):
+            return cls((item['id'], item['name'], item.get('country', ''))
+                       for item in json.loads(data))
+        
+        reader = csv.DictReader(io.StringIO(data.decode('utf-8')))
+        return cls((row['id'], row['name'], row.get('country', '')) for row in reader)
+    
+    def lookup(self, name, country=None):
+        """
+        Resolve a city name to its ID
+        
+        Args:
+            name (str): City name, optionally with a country code ("Paris,FR")
+            country (str): ISO country code to narrow ambiguous names
+            
+        Returns:
+            int: City ID, or None if the name is unknown or ambiguous (many
+                places share a name; those fall back to a by-name request)
+        """
+        if country is None and ',' in name:
+            name, _, suffix = name.rpartition(',')
+            country = suffix.strip() or None
+        
+        key = city_key(name)
+        low = bisect_left(self._keys, key)
+        high = bisect_right(self._keys, key, low)
+        
+        if country is not None:
+            country = country.upper()
+            matches = [i for i in range(low, high) if self._countries[2 * i:2 * i + 2] == country]
+        else:
+            matches = range(low, high)
+        
+        return self._ids[matches[0]] if len(matches) == 1 else None
+
+
+def get_default_index():
+    """
+    Get the process-wide city index, if a city list is configured
+    
+    Returns:
+        CityIndex: Index over config.CITY_LIST_PATH, or None when unset
+    """
+    global _default_index
+    
+    if _default_index is None and config.CITY_LIST_PATH:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = CityIndex.load(config.CITY_LIST_PATH)
+    return _default_index
+
+
+def reset_default_index():
+    """Forget the shared index so it is reloaded from config"""
+    global _default_index
+    
+    with _default_lock:
+        _default_index = None
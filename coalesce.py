@@ -0,0 +1,113 @@
+"""
+Request coalescing module
+Single-flight de-duplication of concurrent lookups for the same key
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one call (threads)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+    
+    def do(self, key, fn, *args):
+        """
+        Run fn(*args) unless a call for key is already in flight
+        
+        Callers that arrive while the first call is running wait for it and
+        receive the same result, or the same exception.
+        
+        Args:
+            key: Identity of the call (e.g. cache.make_key output)
+            fn (callable): Function doing the actual work
+            *args: Arguments for fn
+            
+        Returns:
+            The result of the shared call
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.calls += 1
+                leader = True
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+    
+    def stats(self):
+        """
+        Report how many calls were coalesced
+        
+        Returns:
+            dict: Counts of upstream 'calls' made and 'shared' waits
+        """
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared}
+
+
+class AsyncSingleFlight:
+    """Collapse concurrent calls with the same key into one call (asyncio)"""
+    
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+    
+    async def do(self, key, coro_fn, *args):
+        """
+        Await coro_fn(*args) unless a call for key is already in flight
+        
+        The shared call runs in its own task and is shielded, so cancelling
+        one waiter does not cancel the lookup for the others.
+        
+        Args:
+            key: Identity of the call (e.g. cache.make_key output)
+            coro_fn (callable): Coroutine function doing the actual work
+            *args: Arguments for coro_fn
+            
+        Returns:
+            The result of the shared call
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(coro_fn(*args))
+            self._calls[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        
+        return await asyncio.shield(task)
+    
+    def stats(self):
+        """
+        Report how many calls were coalesced
+        
+        Returns:
+            dict: Counts of upstream 'calls' made and 'shared' waits
+        """
+        return {'calls': self.calls, 'shared': self.shared}
@@ -0,0 +1,362 @@
+"""
+Comparison Report Generator
+Renders a multi-city dashboard with sortable tables and inline SVG charts
+"""
+
+import html
+import json
+import os
+import uuid
+import webbrowser
+from array import array
+from datetime import datetime
+import config
+from config import REPORTS_DIR
+from report_generator import write_atomic
+from report_template import CompiledTemplate, REPORT_CSS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to array-module columns
+
+
+# Metrics charted and summarized: (column, label, unit)
+METRICS = (
+    ('temp', 'Temperature', '°C'),
+    ('humidity', 'Humidity', '%'),
+    ('wind_speed', 'Wind Speed', 'm/s'),
+)
+
+HISTOGRAM_BINS = 20
+CHART_WIDTH = 360
+CHART_HEIGHT = 160
+LINE_COLORS = ('#0ea5e9', '#f97316', '#22c55e', '#e11d48', '#a855f7', '#eab308', '#14b8a6', '#f8fafc')
+
+DASHBOARD_CSS = """
+        .container {
+            max-width: 1200px;
+        }
+        
+        .charts {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
+            gap: 20px;
+            margin: 32px 0;
+        }
+        
+        .chart {
+            background: rgba(255, 255, 255, 0.05);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            border-radius: 16px;
+            padding: 16px;
+        }
+        
+        .chart h2 {
+            font-size: 1rem;
+            font-weight: 500;
+            color: var(--text-secondary);
+            margin-bottom: 8px;
+        }
+        
+        .chart svg {
+            width: 100%;
+            height: auto;
+        }
+        
+        table {
+            width: 100%;
+            border-collapse: collapse;
+        }
+        
+        th, td {
+            padding: 10px 12px;
+            text-align: left;
+            border-bottom: 1px solid rgba(255, 255, 255, 0.1);
+        }
+        
+        th {
+            cursor: pointer;
+            color: var(--text-secondary);
+            font-weight: 500;
+            user-select: none;
+        }
+        
+        td.num, th.num {
+            text-align: right;
+        }
+"""
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Weather Comparison - {{ count }} cities</title>
+    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700&display=swap" rel="stylesheet">
+    <style>
+{{ css }}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🌤️ Weather Comparison</h1>
+            <div class="location">{{ count }} cities · {{ generated }}</div>
+        </div>
+        
+        <div class="details-grid">
+{{ summary }}
+        </div>
+        
+        <div class="charts">
+{{ charts }}
+        </div>
+        
+        <table>
+            <thead><tr>
+                <th data-key="city">City</th><th data-key="country">Country</th>
+                <th data-key="temp" class="num">Temp (°C)</th><th data-key="humidity" class="num">Humidity (%)</th>
+                <th data-key="wind_speed" class="num">Wind (m/s)</th><th data-key="description">Conditions</th>
+            </tr></thead>
+            <tbody id="rows"></tbody>
+        </table>
+        
+        <div class="footer">
+            <p>Created with <span class="brand">WeatherWise CLI Dashboard</span></p>
+            <p>Data provided by OpenWeatherMap API</p>
+        </div>
+    </div>
+    <script type="application/json" id="data">{{ payload }}</script>
+    <script>
+        const data = JSON.parse(document.getElementById('data').textContent);
+        const keys = ['city', 'country', 'temp', 'humidity', 'wind_speed', 'description'];
+        const numeric = new Set(['temp', 'humidity', 'wind_speed']);
+        const esc = s => String(s).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+        let order = data.city.map((_, i) => i);
+        let sortKey = null, direction = 1;
+        
+        function render() {
+            document.getElementById('rows').innerHTML = order.map(i => '<tr>' + keys.map(k =>
+                numeric.has(k) ? '<td class="num">' + data[k][i] + '</td>' : '<td>' + esc(data[k][i]) + '</td>'
+            ).join('') + '</tr>').join('');
+        }
+        
+        document.querySelectorAll('th').forEach(th => th.addEventListener('click', () => {
+            const key = th.dataset.key;
+            direction = key === sortKey ? -direction : (numeric.has(key) ? -1 : 1);
+            sortKey = key;
+            const column = data[key];
+            order.sort((a, b) => (column[a] < column[b] ? -1 : column[a] > column[b] ? 1 : 0) * direction);
+            render();
+        }));
+        render();
+    </script>
+</body>
+</html>"""
+
+TEMPLATE = CompiledTemplate(DASHBOARD_TEMPLATE, static={'css': REPORT_CSS + DASHBOARD_CSS})
+
+
+def aggregate(weather_records):
+    """
+    Turn records into columns and per-metric summary statistics
+    
+    Args:
+        weather_records (iterable): Weather data (dicts or WeatherRecords)
+        
+    Returns:
+        tuple: (columns, stats) where columns maps 'city', 'country',
+            'description' to lists and each metric to an array('d'), and
+            stats maps each metric to {'min', 'max', 'mean'}
+    """
+    records = list(weather_records)
+    columns = {
+        'city': [r['city'] for r in records],
+        'country': [r['country'] for r in records],
+        'description': [r['description'] for r in records],
+        # WeatherRecords carry numeric temps; legacy dicts only have Kelvin
+        'temp': array('d', [r.temp if hasattr(r, 'temp') else r['temp_kelvin'] - 273.15 for r in records]),
+        'humidity': array('d', [r['humidity'] for r in records]),
+        'wind_speed': array('d', [r['wind_speed'] for r in records]),
+    }
+    
+    stats = {}
+    for name, _, _ in METRICS:
+        values = columns[name]
+        if not values:
+            stats[name] = {'min': 0.0, 'max': 0.0, 'mean': 0.0}
+        elif np is not None:
+            v = np.frombuffer(values, dtype=np.float64)
+            stats[name] = {'min': float(v.min()), 'max': float(v.max()), 'mean': float(v.mean())}
+        else:
+            stats[name] = {'min': min(values), 'max': max(values), 'mean': sum(values) / len(values)}
+    return columns, stats
+
+
+def histogram(values, lo, hi, bins=HISTOGRAM_BINS):
+    """
+    Count values into equal-width bins between lo and hi
+    
+    Args:
+        values (array): Numeric column
+        lo (float): Lower edge of the first bin
+        hi (float): Upper edge of the last bin
+        bins (int): Number of bins
+        
+    Returns:
+        list: Count per bin
+    """
+    if hi <= lo:
+        return [len(values)] + [0] * (bins - 1)
+    if np is not None:
+        counts, _ = np.histogram(np.frombuffer(values, dtype=np.float64), bins=bins, range=(lo, hi))
+        return counts.tolist()
+    
+    counts = [0] * bins
+    scale = bins / (hi - lo)
+    last = bins - 1
+    for value in values:
+        counts[min(int((value - lo) * scale), last)] += 1
+    return counts
+
+
+def histogram_svg(counts, lo, hi, unit):
+    """
+    Draw a histogram as an inline SVG bar chart
+    
+    Args:
+        counts (list): Count per bin
+        lo (float): Value at the left edge
+        hi (float): Value at the right edge
+        unit (str): Axis unit label
+        
+    Returns:
+        str: SVG markup
+    """
+    peak = max(counts) or 1
+    width = CHART_WIDTH / len(counts)
+    plot_height = CHART_HEIGHT - 20
+    bars = ''.join(
+        f'<rect x="{i * width + 1:.1f}" y="{plot_height - count / peak * plot_height:.1f}" '
+        f'width="{width - 2:.1f}" height="{count / peak * plot_height:.1f}" rx="2"><title>{count}</title></rect>'
+        for i, count in enumerate(counts)
+    )
+    return (
+        f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" fill="#0ea5e9">{bars}'
+        f'<text x="0" y="{CHART_HEIGHT - 4}" fill="#94a3b8" font-size="11">{lo:.1f} {unit}</text>'
+        f'<text x="{CHART_WIDTH}" y="{CHART_HEIGHT - 4}" fill="#94a3b8" font-size="11" text-anchor="end">{hi:.1f} {unit}</text>'
+        '</svg>'
+    )
+
+
+def history_svg(history, column='temp'):
+    """
+    Draw one line per city from stored history
+    
+    Args:
+        history (dict): City name -> columns from ObservationStore.query or
+            downsample (needs 'dt' and the charted column)
+        column (str): Column to chart
+        
+    Returns:
+        str: SVG markup, or '' if there is nothing to draw
+    """
+    series = [(city, cols['dt'], cols[column]) for city, cols in history.items() if len(cols['dt'])]
+    if not series:
+        return ''
+    
+    t0 = min(dt[0] for _, dt, _ in series)
+    t1 = max(dt[-1] for _, dt, _ in series)
+    v0 = min(min(values) for _, _, values in series)
+    v1 = max(max(values) for _, _, values in series)
+    sx = CHART_WIDTH / ((t1 - t0) or 1)
+    sy = (CHART_HEIGHT - 10) / ((v1 - v0) or 1)
+    
+    lines = []
+    for i, (city, dt, values) in enumerate(series):
+        points = ' '.join(f'{(t - t0) * sx:.1f},{CHART_HEIGHT - 5 - (v - v0) * sy:.1f}' for t, v in zip(dt, values))
+        color = LINE_COLORS[i % len(LINE_COLORS)]
+        lines.append(f'<polyline points="{points}" stroke="{color}"><title>{html.escape(city)}</title></polyline>')
+    return (f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" fill="none" stroke-width="2">'
+            + ''.join(lines) + '</svg>')
+
+
+def _payload(columns):
+    """Serialize columns as one JSON document safe to embed in <script>"""
+    data = {
+        'city': columns['city'],
+        'country': columns['country'],
+        'description': columns['description'],
+    }
+    for name, _, _ in METRICS:
+        data[name] = [round(v, 1) for v in columns[name]]
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def render_comparison_report(weather_records, history=None):
+    """
+    Render the multi-city comparison dashboard in memory
+    
+    Args:
+        weather_records (iterable): Weather data (dicts or WeatherRecords)
+        history (dict): Optional city -> stored columns, charted over time
+        
+    Returns:
+        str: Complete HTML document
+    """
+    columns, stats = aggregate(weather_records)
+    
+    summary = []
+    charts = []
+    for name, label, unit in METRICS:
+        s = stats[name]
+        summary.append(
+            f'            <div class="detail-card"><div class="label">{label}</div>'
+            f'<div class="value">{s["mean"]:.1f}<span class="unit"> {unit} avg</span></div>'
+            f'<div class="unit">{s["min"]:.1f} – {s["max"]:.1f} {unit}</div></div>'
+        )
+        counts = histogram(columns[name], s['min'], s['max'])
+        charts.append(f'            <div class="chart"><h2>{label} distribution</h2>'
+                      f'{histogram_svg(counts, s["min"], s["max"], unit)}</div>')
+    
+    if history:
+        chart = history_svg(history)
+        if chart:
+            charts.append(f'            <div class="chart"><h2>Temperature history</h2>{chart}</div>')
+    
+    return TEMPLATE.render({
+        'count': str(len(columns['city'])),
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'summary': '\n'.join(summary),
+        'charts': '\n'.join(charts),
+        'payload': _payload(columns)
+    })
+
+
+def create_comparison_report(weather_records, history=None, open_browser=None, reports_dir=None):
+    """
+    Generate the multi-city comparison dashboard
+    
+    Args:
+        weather_records (iterable): Weather data (dicts or WeatherRecords)
+        history (dict): Optional city -> stored columns, charted over time
+        open_browser (bool): Open the report afterwards (defaults to
+            not config.HEADLESS)
+        reports_dir (str): Output directory (defaults to REPORTS_DIR)
+        
+    Returns:
+        str: Path to generated HTML file
+    """
+    if open_browser is None:
+        open_browser = not config.HEADLESS
+    reports_dir = reports_dir or REPORTS_DIR
+    os.makedirs(reports_dir, exist_ok=True)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filepath = os.path.join(reports_dir, f"weather_comparison_{timestamp}_{uuid.uuid4().hex[:8]}.html")
+    write_atomic(filepath, render_comparison_report(weather_records, history))
+    
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(filepath))
+    
+    return filepath
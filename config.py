@@ -5,28 +5,110 @@ Contains API keys, constants, and settings
 
 import os
 
-# Try to load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # dotenv not installed, will use environment variables directly
-
 # API Configuration
-API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
 BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+GROUP_URL = "https://api.openweathermap.org/data/2.5/group"
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+# Settings read from the environment (or a .env file). They are resolved on
+# first access, so importing config does no I/O and prints nothing.
+#   name: (environment variable, default, converter)
+_ENV_SETTINGS = {
+    'API_KEY': ("OPENWEATHER_API_KEY", "", str),
+    # Optional SQLite cache shared by all processes, e.g. "reports/cache.sqlite3"
+    'DISK_CACHE_PATH': ("WEATHERWISE_CACHE_PATH", "", str),
+    # Optional SQLite history of every observation, e.g. "reports/history.sqlite3"
+    'HISTORY_DB_PATH': ("WEATHERWISE_HISTORY_PATH", "", str),
+    # Skip opening reports in a browser (for servers and scripts)
+    'HEADLESS': ("WEATHERWISE_HEADLESS", "", _flag),
+    # Per-stage timing histograms and hot-path counters (see metrics.py)
+    'METRICS_ENABLED': ("WEATHERWISE_METRICS", "", _flag),
+    # Write metrics in Prometheus text format here after batch runs
+    'METRICS_FILE': ("WEATHERWISE_METRICS_FILE", "", str),
+    # Optional city list (OpenWeatherMap city.list.json[.gz] or id,name,country
+    # CSV) used to resolve names to IDs offline and batch them into group requests
+    'CITY_LIST_PATH': ("WEATHERWISE_CITY_LIST", "", str),
+}
+_env_loaded = False
+
+
+def _load_env():
+    """Load the .env file once, the first time a setting needs it"""
+    global _env_loaded
+    
+    if _env_loaded:
+        return
+    _env_loaded = True
+    
+    # Try to load environment variables from .env file
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # dotenv not installed, will use environment variables directly
+
+
+def __getattr__(name):
+    """Resolve environment-backed settings on first use and keep the value"""
+    setting = _ENV_SETTINGS.get(name)
+    if setting is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    _load_env()
+    variable, default, convert = setting
+    value = convert(os.getenv(variable, default))
+    globals()[name] = value
+    
+    # Validate API key on first use (helpful warning for users)
+    if name == 'API_KEY' and not value:
+        print("WARNING: OPENWEATHER_API_KEY not set in .env file")
+        print("Get your free API key at: https://openweathermap.org/api")
+        print()
+    
+    return value
 
-# Validate API key on import (helpful warning for users)
-if not API_KEY:
-    print("WARNING: OPENWEATHER_API_KEY not set in .env file")
-    print("Get your free API key at: https://openweathermap.org/api")
-    print()
 
 # Default Settings
 DEFAULT_UNIT = "celsius"
 TIMEOUT = 10  # API request timeout in seconds
 
+# Connection Pool Settings
+POOL_CONNECTIONS = 10  # Number of per-host pools to keep around
+POOL_MAXSIZE = 20  # Keep-alive connections per host
+POOL_BLOCK = False  # True makes POOL_MAXSIZE a hard per-host connection limit
+KEEP_ALIVE = True  # Reuse connections between requests
+
+# Batch Settings
+BATCH_WORKERS = 20  # Concurrent lookups in fetch_many (keep <= POOL_MAXSIZE)
+ASYNC_MAX_IN_FLIGHT = 1000  # Concurrent lookups in AsyncWeatherAPI
+GROUP_SIZE = 20  # City IDs per group request (OpenWeatherMap's maximum)
+HISTORY_BATCH_SIZE = 100  # Observations written per history transaction during batches
+
+# Cache Settings
+CACHE_TTL = 300  # Seconds a fetched result stays fresh (0 disables caching)
+CACHE_MAX_ENTRIES = 1024  # Least recently used entries are evicted beyond this
+
+# Rate Limit Settings (per API key; 0 disables a limit)
+RATE_LIMIT_PER_MINUTE = 60  # Free tier allows 60 calls per minute
+RATE_LIMIT_PER_DAY = 0
+RATE_LIMIT_BURST = 10  # Calls allowed back-to-back before pacing kicks in
+RATE_LIMIT_MAX_WAIT = 60  # Seconds to wait for budget before giving up
+# Batch lookups queue behind the per-minute budget instead of failing; the
+# daily budget still fails fast after RATE_LIMIT_MAX_WAIT
+RATE_LIMIT_BATCH_MAX_WAIT = float('inf')
+
+# Retry Settings
+RETRY_MAX_ATTEMPTS = 3  # Total tries for timeouts, 429s and 5xx responses
+RETRY_BASE_DELAY = 0.5  # Seconds; doubles each attempt, with full jitter
+RETRY_MAX_DELAY = 8  # Cap on any single backoff (longer Retry-After gives up)
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive upstream failures that open the circuit
+BREAKER_COOLDOWN = 30  # Seconds to fast-fail before probing the upstream again
+
 # Temperature thresholds for recommendations (in Celsius)
 COLD_THRESHOLD = 10
 HOT_THRESHOLD = 30
@@ -34,3 +116,4 @@ HOT_THRESHOLD = 30
 # Report Settings
 REPORTS_DIR = "reports"
 TEMPLATE_DIR = "templates"
+REPORT_WORKERS = os.cpu_count() or 4  # Parallel writers in create_html_reports
@@ -0,0 +1,180 @@
+"""
+Persistent cache module
+SQLite-backed cache of parsed weather records shared across processes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import config
+from models import WeatherRecord
+
+
+def thread_connection(local, path):
+    """
+    Get this thread's connection to a database (sqlite3 connections are per-thread)
+    
+    Args:
+        local (threading.local): Per-thread holder owned by the caller
+        path (str): SQLite file path
+        
+    Returns:
+        sqlite3.Connection: Connection in WAL mode, opened on first use
+    """
+    conn = getattr(local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        # WAL lets readers proceed while another process writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        local.conn = conn
+    return conn
+
+
+def _encode(value):
+    """Serialize a cached value, keeping WeatherRecords numeric"""
+    if isinstance(value, WeatherRecord):
+        return json.dumps({'record': value.to_fields()})
+    return json.dumps({'value': value})
+
+
+def _decode(data):
+    """Inverse of _encode"""
+    obj = json.loads(data)
+    if 'record' in obj:
+        return WeatherRecord(**obj['record'])
+    return obj['value']
+
+
+class DiskCache:
+    """TTL cache stored in SQLite, safe for concurrent readers and writers"""
+    
+    def __init__(self, path=None, ttl=None, clock=time.time):
+        """
+        Initialize DiskCache, creating the database if needed
+        
+        Args:
+            path (str): SQLite file path (defaults to config.DISK_CACHE_PATH)
+            ttl (float): Seconds an entry stays fresh (defaults to config.CACHE_TTL)
+            clock (callable): Wall-clock time source, shared by all processes
+        """
+        self.path = path or config.DISK_CACHE_PATH
+        if not self.path:
+            raise ValueError("Disk cache path not configured")
+        self.ttl = config.CACHE_TTL if ttl is None else ttl
+        self._clock = clock
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS weather_cache ("
+                " city TEXT NOT NULL,"
+                " units TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (city, units))"
+            )
+    
+    def _connect(self):
+        return thread_connection(self._local, self.path)
+    
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def get_entry(self, key):
+        """
+        Look up a fresh entry along with its fetch time
+        
+        Args:
+            key (tuple): (city, units) key from cache.make_key
+            
+        Returns:
+            tuple: (value, fetched_at) or None on a miss
+        """
+        row = self._connect().execute(
+            "SELECT data, fetched_at FROM weather_cache WHERE city = ? AND units = ?",
+            key
+        ).fetchone()
+        
+        if row is None or row[1] + self.ttl <= self._clock():
+            self._count(False)
+            return None
+        
+        self._count(True)
+        return _decode(row[0]), row[1]
+    
+    def get(self, key):
+        """
+        Look up a fresh entry
+        
+        Args:
+            key (tuple): (city, units) key from cache.make_key
+            
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+    
+    def set(self, key, value):
+        """
+        Store a value with the current fetch time
+        
+        Args:
+            key (tuple): (city, units) key from cache.make_key
+            value (WeatherRecord): Record (or any JSON-serializable value)
+        """
+        if self.ttl <= 0:
+            return
+        
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO weather_cache (city, units, fetched_at, data) "
+                "VALUES (?, ?, ?, ?)",
+                (key[0], key[1], self._clock(), _encode(value))
+            )
+    
+    def prune(self):
+        """
+        Delete expired entries
+        
+        Returns:
+            int: Number of entries removed
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM weather_cache WHERE fetched_at <= ?",
+                (self._clock() - self.ttl,)
+            )
+            return cursor.rowcount
+    
+    def clear(self):
+        """Delete all entries and reset statistics"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM weather_cache")
+        with self._stats_lock:
+            self.hits = self.misses = 0
+    
+    def stats(self):
+        """
+        Report cache effectiveness
+        
+        Returns:
+            dict: Counts for 'hits', 'misses' and stored 'size'
+        """
+        size = self._connect().execute("SELECT COUNT(*) FROM weather_cache").fetchone()[0]
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': size}
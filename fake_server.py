@@ -0,0 +1,235 @@
+"""
+Fake OpenWeatherMap server module
+Local stand-in for the API with configurable latency, errors and 429s
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+# Cities starting with this prefix answer 404, like an unknown city upstream
+MISSING_PREFIX = 'Missing'
+
+
+def weather_payload(city, dt=1609459200):
+    """
+    Build a current-weather body shaped like the real API's
+    
+    Args:
+        city (str): City name to echo back
+        dt (int): Observation time, Unix seconds
+        
+    Returns:
+        dict: /data/2.5/weather response
+    """
+    return {
+        'coord': {'lon': -0.13, 'lat': 51.51},
+        'weather': [{'id': 800, 'main': 'Clear', 'description': 'clear sky', 'icon': '01d'}],
+        'base': 'stations',
+        'main': {'temp': 20.0, 'feels_like': 18.5, 'temp_min': 18.0, 'temp_max': 22.0,
+                 'pressure': 1013, 'humidity': 65},
+        'visibility': 10000,
+        'wind': {'speed': 5.5, 'deg': 240},
+        'clouds': {'all': 0},
+        'dt': dt,
+        'sys': {'country': 'XX', 'sunrise': dt - 21600, 'sunset': dt + 21600},
+        'timezone': 0,
+        'id': zlib.crc32(city.encode()) % 10000000,
+        'name': city,
+        'cod': 200
+    }
+
+
+def group_payload(city_ids, names=None, dt=1609459200):
+    """
+    Build a group (several cities by ID) body shaped like the real API's
+    
+    Args:
+        city_ids (list): Requested city IDs
+        names (dict): City ID -> name to echo back (default "City <id>")
+        dt (int): Observation time, Unix seconds
+        
+    Returns:
+        dict: /data/2.5/group response; IDs not in names are left out when
+            names is given, like IDs unknown upstream
+    """
+    entries = []
+    for city_id in city_ids:
+        if names is not None and city_id not in names:
+            continue
+        entry = weather_payload(names[city_id] if names is not None else f"City {city_id}", dt)
+        entry['id'] = city_id
+        entries.append(entry)
+    return {'cnt': len(entries), 'list': entries}
+
+
+def forecast_payload(city, steps=40, start=1609459200):
+    """
+    Build a 5-day / 3-hour forecast body shaped like the real API's
+    
+    Args:
+        city (str): City name to echo back
+        steps (int): Number of 3-hour entries
+        start (int): First entry time, Unix seconds
+        
+    Returns:
+        dict: /data/2.5/forecast response
+    """
+    return {
+        'cod': '200',
+        'cnt': steps,
+        'list': [
+            {
+                'dt': start + i * 10800,
+                'main': {'temp': 10.0 + i % 8, 'feels_like': 9.0, 'temp_min': 9.0, 'temp_max': 12.0,
+                         'pressure': 1013, 'humidity': 60 + i % 20},
+                'weather': [{'id': 800, 'main': 'Clear', 'description': 'clear sky', 'icon': '01d'}],
+                'clouds': {'all': 0},
+                'wind': {'speed': 3.0 + i % 5, 'deg': 200},
+                'visibility': 10000,
+                'pop': 0,
+                'dt_txt': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start + i * 10800))
+            }
+            for i in range(steps)
+        ],
+        'city': {'name': city, 'country': 'XX', 'timezone': 0}
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering the weather, group and forecast endpoints"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        owner = self.server.owner
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        city = query.get('q', query.get('id', ['']))[0]
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        
+        if owner.latency:
+            time.sleep(owner.latency)
+        
+        status, headers, body = owner.respond(endpoint, city)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+class FakeWeatherServer:
+    """Threaded local HTTP server that imitates OpenWeatherMap"""
+    
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_every=0, retry_after=1, seed=None,
+                 city_names=None):
+        """
+        Initialize the server (call start() or use it as a context manager)
+        
+        Args:
+            latency (float): Seconds to wait before answering each request
+            error_rate (float): Fraction of requests answered with a 500
+            throttle_every (int): Answer every Nth request with a 429 (0 disables)
+            retry_after (int): Retry-After seconds sent with 429s
+            seed (int): Seed for the error-rate draws, for repeatable runs
+            city_names (dict): City ID -> name known to the group endpoint
+                (default: every ID is known)
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.city_names = city_names
+        self.statuses = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._server = None
+        self._thread = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def start(self):
+        """Start serving on a free localhost port"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving and release the port"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/data/2.5"
+    
+    @property
+    def weather_url(self):
+        return f"{self.base_url}/weather"
+    
+    @property
+    def group_url(self):
+        return f"{self.base_url}/group"
+    
+    @property
+    def forecast_url(self):
+        return f"{self.base_url}/forecast"
+    
+    def respond(self, endpoint, city):
+        """
+        Decide the answer to one request
+        
+        Args:
+            endpoint (str): Last path segment, e.g. 'weather'
+            city (str): Requested city, or comma-separated IDs for 'group'
+            
+        Returns:
+            tuple: (status, headers, body)
+        """
+        with self._lock:
+            self._requests += 1
+            throttled = self.throttle_every and self._requests % self.throttle_every == 0
+            failed = not throttled and self.error_rate and self._rng.random() < self.error_rate
+        
+        if throttled:
+            status, headers, body = 429, {'Retry-After': str(self.retry_after)}, {'cod': 429}
+        elif failed:
+            status, headers, body = 500, {}, {'cod': 500, 'message': 'Internal error'}
+        elif city.startswith(MISSING_PREFIX):
+            status, headers, body = 404, {}, {'cod': '404', 'message': 'city not found'}
+        elif endpoint == 'group':
+            city_ids = [int(city_id) for city_id in city.split(',') if city_id]
+            status, headers, body = 200, {}, group_payload(city_ids, self.city_names)
+        elif endpoint == 'forecast':
+            status, headers, body = 200, {}, forecast_payload(city)
+        else:
+            status, headers, body = 200, {}, weather_payload(city)
+        
+        with self._lock:
+            self.statuses[status] += 1
+        return status, headers, body
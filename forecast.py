@@ -0,0 +1,131 @@
+"""
+Forecast module
+Columnar storage and daily rollups for the 5-day / 3-hour forecast
+"""
+
+from array import array
+from datetime import datetime, timezone
+from units import to_array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to slicing the array columns
+
+
+# Numeric columns and the typecode each one is stored with
+COLUMNS = (
+    ('temp', 'd'),
+    ('humidity', 'd'),
+    ('wind_speed', 'd'),
+    ('pressure', 'd'),
+)
+
+
+class Forecast:
+    """Forecast series for one city stored as parallel typed arrays"""
+    
+    __slots__ = ('city', 'country', 'tz_offset', 'timestamps', 'temp', 'humidity', 'wind_speed', 'pressure')
+    
+    def __init__(self, city, country, tz_offset, timestamps, temp, humidity, wind_speed, pressure):
+        """
+        Initialize Forecast
+        
+        Args:
+            city (str): City name
+            country (str): Country code
+            tz_offset (int): City's offset from UTC in seconds
+            timestamps (array): Epoch seconds per step ('q')
+            temp (array): Temperatures in °C per step ('d')
+            humidity (array): Relative humidity in % per step ('d')
+            wind_speed (array): Wind speed in m/s per step ('d')
+            pressure (array): Pressure in hPa per step ('d')
+        """
+        self.city = city
+        self.country = country
+        self.tz_offset = tz_offset
+        self.timestamps = timestamps
+        self.temp = temp
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.pressure = pressure
+    
+    def __len__(self):
+        return len(self.timestamps)
+    
+    @classmethod
+    def from_api(cls, raw_data):
+        """
+        Build a Forecast from a /forecast API response
+        
+        Args:
+            raw_data (dict): Raw JSON response from API
+            
+        Returns:
+            Forecast: Columnar forecast
+        """
+        entries = raw_data['list']
+        mains = [entry['main'] for entry in entries]
+        return cls(
+            city=raw_data['city']['name'],
+            country=raw_data['city'].get('country', ''),
+            tz_offset=raw_data['city'].get('timezone', 0),
+            timestamps=array('q', [entry['dt'] for entry in entries]),
+            temp=array('d', [main['temp'] for main in mains]),
+            humidity=array('d', [main['humidity'] for main in mains]),
+            wind_speed=array('d', [entry['wind']['speed'] for entry in entries]),
+            pressure=array('d', [main['pressure'] for main in mains])
+        )
+    
+    def daily(self):
+        """
+        Roll the series up into per-day min, max and mean values
+        
+        Days are calendar days in the city's local time. Uses NumPy
+        reductions when available, otherwise C-level min/max/sum over
+        array slices.
+        
+        Returns:
+            dict: 'date' (list of 'YYYY-MM-DD') plus '<column>_min',
+                '<column>_max' and '<column>_mean' arrays for each column
+        """
+        if not self.timestamps:
+            return {'date': []}
+        
+        if np is not None:
+            days = (np.frombuffer(self.timestamps, dtype=np.int64) + self.tz_offset) // 86400
+            starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+            counts = np.diff(np.append(starts, len(days)))
+            result = {'date': [_day_to_date(int(day)) for day in days[starts]]}
+            
+            for name, typecode in COLUMNS:
+                values = np.frombuffer(getattr(self, name), dtype=np.float64)
+                result[f'{name}_min'] = to_array(np.minimum.reduceat(values, starts))
+                result[f'{name}_max'] = to_array(np.maximum.reduceat(values, starts))
+                result[f'{name}_mean'] = to_array(np.add.reduceat(values, starts) / counts)
+            return result
+        
+        # Timestamps are sorted, so each day is one contiguous slice
+        offset = self.tz_offset
+        bounds = []
+        previous = None
+        for i, ts in enumerate(self.timestamps):
+            day = (ts + offset) // 86400
+            if day != previous:
+                bounds.append((i, day))
+                previous = day
+        ends = [start for start, _ in bounds[1:]] + [len(self.timestamps)]
+        
+        result = {'date': [_day_to_date(day) for _, day in bounds]}
+        for name, typecode in COLUMNS:
+            column = getattr(self, name)
+            slices = [column[start:end] for (start, _), end in zip(bounds, ends)]
+            result[f'{name}_min'] = array(typecode, map(min, slices))
+            result[f'{name}_max'] = array(typecode, map(max, slices))
+            result[f'{name}_mean'] = array(typecode, [sum(s) / len(s) for s in slices])
+        return result
+
+
+def _day_to_date(day):
+    """Convert a day number since the epoch to 'YYYY-MM-DD'"""
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime('%Y-%m-%d')
@@ -0,0 +1,159 @@
+"""
+HTTP connection pool module
+Provides a shared keep-alive session so lookups reuse TCP/TLS connections
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import config
+import metrics
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class _TimedConnectMixin:
+    """Reports TCP connect time (the 'connect' stage) for new connections"""
+    
+    _tcp_seconds = 0.0
+    
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        self._tcp_seconds = time.perf_counter() - start
+        metrics.observe_stage('connect', self._tcp_seconds)
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    """Also reports the TLS handshake (the 'tls' stage)"""
+    
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        metrics.observe_stage('tls', time.perf_counter() - start - self._tcp_seconds)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools time connection setup; reused connections cost nothing"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def create_session(pool_connections=None, pool_maxsize=None, pool_block=None, keep_alive=None):
+    """
+    Create a requests session with a sized connection pool
+    
+    Args:
+        pool_connections (int): Number of per-host pools to cache
+        pool_maxsize (int): Maximum keep-alive connections per host
+        pool_block (bool): Wait for a free connection instead of opening extra ones
+        keep_alive (bool): Reuse connections between requests
+        
+    Returns:
+        requests.Session: Configured session
+    """
+    if pool_connections is None:
+        pool_connections = config.POOL_CONNECTIONS
+    if pool_maxsize is None:
+        pool_maxsize = config.POOL_MAXSIZE
+    if pool_block is None:
+        pool_block = config.POOL_BLOCK
+    if keep_alive is None:
+        keep_alive = config.KEEP_ALIVE
+    
+    session = requests.Session()
+    adapter = _TimedAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    
+    return session
+
+
+def get_session():
+    """
+    Get the shared session, creating it on first use
+    
+    Returns:
+        requests.Session: Process-wide pooled session
+    """
+    global _session
+    
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Close the shared session and drop its pooled connections"""
+    global _session
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def pool_stats(session=None):
+    """
+    Report connection reuse for a session
+    
+    A miss is a request that had to open a new connection; a hit is a
+    request served on an already-open keep-alive connection.
+    
+    Args:
+        session (requests.Session): Session to inspect (defaults to the shared one)
+        
+    Returns:
+        dict: Counts for 'requests', 'hits', 'misses' and open 'pools'
+    """
+    if session is None:
+        session = _session
+    
+    stats = {'requests': 0, 'hits': 0, 'misses': 0, 'pools': 0}
+    if session is None:
+        return stats
+    
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['pools'] += 1
+            stats['requests'] += pool.num_requests
+            stats['misses'] += pool.num_connections
+    
+    stats['hits'] = max(stats['requests'] - stats['misses'], 0)
+    return stats
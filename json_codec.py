@@ -0,0 +1,44 @@
+"""
+JSON decoding module
+Decodes API response bodies straight from bytes, using orjson when available
+"""
+
+import json
+import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the standard library decoder
+
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Both accept bytes directly: orjson parses them in place, and the stdlib
+# detects UTF-8/16/32 itself, so we never go through requests' charset guessing
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def loads(content):
+    """
+    Decode a JSON response body
+    
+    While metrics are enabled, decode time is reported separately from
+    request time as the 'decode' stage, and body sizes as the
+    'weather_json_decoded_bytes_total' counter.
+    
+    Args:
+        content (bytes): Raw response body
+        
+    Returns:
+        Decoded JSON value
+        
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if not metrics.enabled:
+        return _loads(content)
+    
+    metrics.inc('weather_json_decoded_bytes_total', len(content))
+    with metrics.stage('decode'):
+        return _loads(content)
@@ -0,0 +1,294 @@
+"""
+Metrics module
+Process-wide counters, gauges and per-stage timing histograms for the
+weather pipeline, with hooks and Prometheus text export
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import nullcontext
+import config
+
+
+# Upper bounds (seconds) of the stage histogram buckets; +Inf is implied
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_METRIC = 'weather_stage_seconds'
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+_hooks = []
+
+# Hot-path instrumentation (stage timings, cache and byte counters) is only
+# recorded while metrics.enabled is true; call sites check it before doing any
+# work. It is resolved from config.METRICS_ENABLED on first use (see
+# __getattr__), so importing this module doesn't load .env.
+_module = sys.modules[__name__]
+
+_NOOP = nullcontext()
+
+
+def __getattr__(name):
+    """Resolve enabled from config on first use and keep the value"""
+    if name != 'enabled':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    enable(config.METRICS_ENABLED)
+    return enabled
+
+
+def enable(on=True):
+    """
+    Turn hot-path instrumentation on or off
+    
+    Rare events (retries, circuit breaker changes) are always counted.
+    
+    Args:
+        on (bool): Whether to record stage timings and hot-path counters
+    """
+    global enabled
+    enabled = bool(on)
+
+
+def add_hook(hook):
+    """
+    Register a callable notified of every metric update
+    
+    Args:
+        hook (callable): Called as hook(kind, name, value, labels) with kind
+            one of 'counter', 'gauge' or 'histogram'
+    """
+    with _lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Unregister a hook added with add_hook"""
+    with _lock:
+        _hooks.remove(hook)
+
+
+def _notify(kind, name, value, labels):
+    for hook in list(_hooks):
+        hook(kind, name, value, labels)
+
+
+def inc(name, value=1):
+    """
+    Increase a counter
+    
+    Args:
+        name (str): Counter name, e.g. 'weather_retries_total'
+        value (float): Amount to add
+    """
+    with _lock:
+        _counters[name] += value
+    if _hooks:
+        _notify('counter', name, value, ())
+
+
+def set_gauge(name, value):
+    """
+    Record the current value of a gauge
+    
+    Args:
+        name (str): Gauge name, e.g. 'weather_circuit_state'
+        value (float): Current value
+    """
+    with _lock:
+        _gauges[name] = value
+    if _hooks:
+        _notify('gauge', name, value, ())
+
+
+def observe(name, value, labels=()):
+    """
+    Record one sample in a histogram
+    
+    Args:
+        name (str): Histogram name, e.g. 'weather_stage_seconds'
+        value (float): Sample, in seconds for timings
+        labels (tuple): (label, value) pairs, e.g. (('stage', 'decode'),)
+    """
+    with _lock:
+        histogram = _histograms.get((name, labels))
+        if histogram is None:
+            histogram = _histograms[(name, labels)] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][bisect_left(BUCKETS, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+    if _hooks:
+        _notify('histogram', name, value, labels)
+
+
+def observe_stage(stage, seconds):
+    """Record how long one pipeline stage took (no-op while disabled)"""
+    if _module.enabled:
+        observe(STAGE_METRIC, seconds, (('stage', stage),))
+
+
+class _StageTimer:
+    """Context manager timing a block as one pipeline stage"""
+    
+    __slots__ = ('stage', 'start')
+    
+    def __init__(self, stage):
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        observe(STAGE_METRIC, time.perf_counter() - self.start, (('stage', self.stage),))
+
+
+def stage(name):
+    """
+    Time a block as a pipeline stage
+    
+    Stages are connect, tls, ttfb, decode, parse, render and write. While
+    instrumentation is disabled this returns a shared no-op context manager.
+    
+    Args:
+        name (str): Stage name
+        
+    Returns:
+        Context manager recording the block's duration
+    """
+    return _StageTimer(name) if _module.enabled else _NOOP
+
+
+def snapshot():
+    """
+    Copy all current metric values
+    
+    Returns:
+        dict: {'counters': {...}, 'gauges': {...}, 'histograms': {...}};
+            histograms are keyed by name, or 'name{label="value"}' when
+            labelled, and hold count, sum and cumulative bucket counts
+    """
+    with _lock:
+        histograms = {
+            _series(name, labels): {
+                'count': count,
+                'sum': total,
+                'buckets': dict(zip(BUCKETS + (float('inf'),), _cumulative(counts)))
+            }
+            for (name, labels), (counts, total, count) in _histograms.items()
+        }
+        return {'counters': dict(_counters), 'gauges': dict(_gauges), 'histograms': histograms}
+
+
+def reset():
+    """Clear all metrics"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _cumulative(counts):
+    running = 0
+    totals = []
+    for count in counts:
+        running += count
+        totals.append(running)
+    return totals
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+def _format_le(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def to_prometheus():
+    """
+    Render all metrics in the Prometheus text exposition format
+    
+    Returns:
+        str: Exposition text, one '# TYPE' block per metric
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = sorted((key, (list(counts), total, count))
+                            for key, (counts, total, count) in _histograms.items())
+    
+    lines = []
+    for name, value in counters:
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value:g}")
+    for name, value in gauges:
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value:g}")
+    
+    typed = set()
+    for (name, labels), (counts, total, count) in histograms:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        for bound, running in zip(BUCKETS + (float('inf'),), _cumulative(counts)):
+            lines.append(f"{_series(name + '_bucket', labels + (('le', _format_le(bound)),))} {running}")
+        lines.append(f"{_series(name + '_sum', labels)} {total:g}")
+        lines.append(f"{_series(name + '_count', labels)} {count}")
+    
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def write_prometheus(path):
+    """
+    Write the Prometheus export to a file (e.g. for node_exporter's textfile collector)
+    
+    Args:
+        path (str): Destination file, replaced atomically
+    """
+    from report_generator import write_atomic
+    
+    write_atomic(path, to_prometheus())
+
+
+def serve(port=9464, host='127.0.0.1'):
+    """
+    Serve the Prometheus export over HTTP from a background thread
+    
+    Args:
+        port (int): Port to listen on (0 picks a free one)
+        host (str): Interface to bind
+        
+    Returns:
+        ThreadingHTTPServer: Running server; call shutdown() to stop it
+    """
+    # http.server is only imported when exporting, to keep this module cheap to import
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Serves the Prometheus export at /metrics"""
+        
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,154 @@
+"""
+Data models module
+Compact, numeric-first record for parsed weather observations
+"""
+
+import sys
+from datetime import datetime
+
+
+class WeatherRecord:
+    """
+    Parsed current-weather observation
+    
+    Attributes hold raw numbers (°C floats, epoch seconds). The record also
+    behaves like the legacy read-only dict, formatting 'temperature',
+    'feels_like' and 'timestamp' as strings only when those keys are read.
+    """
+    
+    __slots__ = ('city', 'country', 'temp', 'feels_like', 'description', 'icon',
+                 'humidity', 'pressure', 'wind_speed', 'dt')
+    
+    # Keys of the legacy dict view, in their original order
+    KEYS = ('city', 'country', 'temperature', 'feels_like', 'temp_kelvin', 'description',
+            'icon', 'humidity', 'pressure', 'wind_speed', 'timestamp')
+    
+    def __init__(self, city, country, temp, feels_like, description, icon,
+                 humidity, pressure, wind_speed, dt):
+        """
+        Initialize WeatherRecord
+        
+        Args:
+            city (str): City name
+            country (str): Country code
+            temp (float): Temperature in °C
+            feels_like (float): Apparent temperature in °C
+            description (str): Weather description
+            icon (str): OpenWeatherMap icon code, e.g. '01d' or '01n'
+            humidity (int): Relative humidity in %
+            pressure (int): Pressure in hPa
+            wind_speed (float): Wind speed in m/s
+            dt (int): Observation time in epoch seconds
+        """
+        self.city = city
+        self.country = sys.intern(country)
+        self.temp = temp
+        self.feels_like = feels_like
+        # Descriptions and icons repeat across observations; share one copy
+        self.description = sys.intern(description)
+        self.icon = sys.intern(icon)
+        self.humidity = humidity
+        self.pressure = pressure
+        self.wind_speed = wind_speed
+        self.dt = dt
+    
+    @classmethod
+    def from_api(cls, raw_data):
+        """
+        Build a record from a current-weather API response
+        
+        Args:
+            raw_data (dict): Raw JSON response from API
+            
+        Returns:
+            WeatherRecord: Parsed record
+        """
+        main = raw_data['main']
+        weather = raw_data['weather'][0]
+        return cls(
+            raw_data['name'],
+            raw_data['sys']['country'],
+            main['temp'],
+            main['feels_like'],
+            weather['description'],
+            weather['icon'],
+            main['humidity'],
+            main['pressure'],
+            raw_data['wind']['speed'],
+            raw_data['dt']
+        )
+    
+    @property
+    def temp_kelvin(self):
+        """float: Temperature in Kelvin"""
+        return self.temp + 273.15
+    
+    def to_fields(self):
+        """
+        Get the raw numeric fields, e.g. for serialization
+        
+        Returns:
+            dict: Constructor arguments keyed by name
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def to_dict(self):
+        """
+        Materialize the legacy dict with preformatted strings
+        
+        Returns:
+            dict: Weather data in the original 11-key layout
+        """
+        return {key: self[key] for key in self.KEYS}
+    
+    # Legacy dict view
+    
+    def __getitem__(self, key):
+        if key == 'temperature':
+            return f"{self.temp:.1f}°C"
+        elif key == 'feels_like':
+            return f"{self.feels_like:.1f}°C"
+        elif key == 'timestamp':
+            return datetime.fromtimestamp(self.dt).strftime('%Y-%m-%d %H:%M:%S')
+        elif key == 'temp_kelvin':
+            return self.temp_kelvin
+        elif key in self.__slots__ and key not in ('temp', 'dt'):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key):
+        return key in self.KEYS
+    
+    def __iter__(self):
+        return iter(self.KEYS)
+    
+    def __len__(self):
+        return len(self.KEYS)
+    
+    def keys(self):
+        return self.KEYS
+    
+    def values(self):
+        return [self[key] for key in self.KEYS]
+    
+    def items(self):
+        return [(key, self[key]) for key in self.KEYS]
+    
+    def __eq__(self, other):
+        if isinstance(other, WeatherRecord):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return (f"WeatherRecord(city={self.city!r}, country={self.country!r}, "
+                f"temp={self.temp!r}, dt={self.dt!r})")
@@ -0,0 +1,229 @@
+"""
+Observation store module
+Append-only history of weather observations with columnar range queries
+"""
+
+import os
+import threading
+from array import array
+import config
+from cache import make_key
+from disk_cache import thread_connection
+
+
+# Numeric columns returned by queries, with their array typecodes
+NUMERIC_COLUMNS = {
+    'temp': 'd',
+    'feels_like': 'd',
+    'humidity': 'd',
+    'pressure': 'd',
+    'wind_speed': 'd',
+}
+
+
+class ObservationStore:
+    """SQLite table of observations clustered by (city, time)"""
+    
+    def __init__(self, path=None):
+        """
+        Initialize ObservationStore, creating the database if needed
+        
+        Args:
+            path (str): SQLite file path (defaults to config.HISTORY_DB_PATH)
+        """
+        self.path = path or config.HISTORY_DB_PATH
+        if not self.path:
+            raise ValueError("History database path not configured")
+        self._local = threading.local()
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # WITHOUT ROWID stores rows in primary-key order, so one city's
+        # history is contiguous on disk and range scans touch few pages
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                " city_key TEXT NOT NULL,"
+                " dt INTEGER NOT NULL,"
+                " city TEXT NOT NULL,"
+                " country TEXT NOT NULL,"
+                " temp REAL NOT NULL,"
+                " feels_like REAL NOT NULL,"
+                " humidity REAL NOT NULL,"
+                " pressure REAL NOT NULL,"
+                " wind_speed REAL NOT NULL,"
+                " description TEXT NOT NULL,"
+                " icon TEXT NOT NULL,"
+                " PRIMARY KEY (city_key, dt)) WITHOUT ROWID"
+            )
+    
+    def _connect(self):
+        return thread_connection(self._local, self.path)
+    
+    @staticmethod
+    def _row(record):
+        return (
+            make_key(record.city)[0], record.dt, record.city, record.country,
+            record.temp, record.feels_like, record.humidity, record.pressure,
+            record.wind_speed, record.description, record.icon
+        )
+    
+    def append(self, record):
+        """
+        Record one observation (repeats of the same city and time are ignored)
+        
+        Args:
+            record (WeatherRecord): Parsed observation
+        """
+        self.append_many((record,))
+    
+    def append_many(self, records):
+        """
+        Record many observations in one transaction
+        
+        Args:
+            records (iterable): WeatherRecords
+            
+        Returns:
+            int: Number of new observations stored
+        """
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                map(self._row, records)
+            )
+            return cursor.rowcount
+    
+    def cities(self):
+        """
+        List the cities with recorded history
+        
+        Returns:
+            list: City names, one per normalized city
+        """
+        rows = self._connect().execute(
+            "SELECT city FROM observations GROUP BY city_key ORDER BY city_key"
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def query(self, city, start=None, end=None, columns=tuple(NUMERIC_COLUMNS)):
+        """
+        Fetch one city's observations in a time range as columns
+        
+        Args:
+            city (str): City name (normalized like cache keys)
+            start (int): Earliest epoch second, inclusive (None for no bound)
+            end (int): Latest epoch second, exclusive (None for no bound)
+            columns (tuple): Numeric columns to return
+            
+        Returns:
+            dict: 'dt' array('q') plus one array('d') per requested column,
+                in time order
+        """
+        columns = _check_columns(columns)
+        sql = f"SELECT dt, {', '.join(columns)} FROM observations WHERE city_key = ?"
+        sql, params = _time_range(sql, [make_key(city)[0]], start, end)
+        rows = self._connect().execute(sql + " ORDER BY dt", params).fetchall()
+        return _to_columns(rows, columns)
+    
+    def downsample(self, city, bucket_seconds, start=None, end=None, columns=tuple(NUMERIC_COLUMNS)):
+        """
+        Average one city's observations into fixed time buckets
+        
+        The aggregation runs inside SQLite, so only one row per bucket
+        reaches Python.
+        
+        Args:
+            city (str): City name
+            bucket_seconds (int): Bucket width, e.g. 3600 for hourly
+            start (int): Earliest epoch second, inclusive
+            end (int): Latest epoch second, exclusive
+            columns (tuple): Numeric columns to average
+            
+        Returns:
+            dict: 'dt' (bucket start) and 'count' arrays plus one array('d')
+                of means per column, plus 'temp_min'/'temp_max' when 'temp'
+                is requested
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        columns = _check_columns(columns)
+        
+        aggregates = [f"AVG({name})" for name in columns]
+        names = list(columns)
+        if 'temp' in columns:
+            aggregates += ["MIN(temp)", "MAX(temp)"]
+            names += ['temp_min', 'temp_max']
+        
+        sql = (f"SELECT (dt / ?) * ? AS bucket, COUNT(*), {', '.join(aggregates)} "
+               f"FROM observations WHERE city_key = ?")
+        sql, params = _time_range(sql, [bucket_seconds, bucket_seconds, make_key(city)[0]], start, end)
+        rows = self._connect().execute(sql + " GROUP BY bucket ORDER BY bucket", params).fetchall()
+        
+        return _to_columns(rows, ['count'] + names)
+    
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _check_columns(columns):
+    """Reject unknown column names (they are interpolated into SQL)"""
+    columns = tuple(columns)
+    for name in columns:
+        if name not in NUMERIC_COLUMNS:
+            raise ValueError(f"Unknown column: {name}")
+    return columns
+
+
+def _time_range(sql, params, start, end):
+    """Append optional dt bounds to a query"""
+    if start is not None:
+        sql += " AND dt >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND dt < ?"
+        params.append(end)
+    return sql, params
+
+
+def _to_columns(rows, names):
+    """Transpose result rows into typed arrays, first column being 'dt'"""
+    columns = list(zip(*rows)) if rows else [()] * (len(names) + 1)
+    result = {'dt': array('q', columns[0])}
+    for name, values in zip(names, columns[1:]):
+        result[name] = array('q' if name == 'count' else 'd', values)
+    return result
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_store():
+    """
+    Get the process-wide store, if history is enabled
+    
+    Returns:
+        ObservationStore: Store at config.HISTORY_DB_PATH, or None when unset
+    """
+    global _default_store
+    
+    if _default_store is None and config.HISTORY_DB_PATH:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = ObservationStore()
+    return _default_store
+
+
+def reset_default_store():
+    """Forget the shared store so it is rebuilt from config"""
+    global _default_store
+    
+    with _default_lock:
+        _default_store = None
@@ -6,15 +6,26 @@ CS50P Final Project
 """
 
 import sys
-import requests
-from datetime import datetime
-import re
 
 
 def main():
     """
     Main function - handles user interaction and program flow
+    
+    With --batch (e.g. `project.py --batch cities.txt`), runs the
+    non-interactive batch mode instead; see batch_cli.
     """
+    if '--batch' in sys.argv[1:]:
+        from batch_cli import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+    if len(sys.argv) > 1:
+        print("usage: project.py [--batch [FILE] [options]]\n"
+              "Run without arguments for the interactive dashboard, "
+              "or see project.py --batch --help.", file=sys.stderr)
+        sys.exit(2)
+    
+    import requests
+    
     print("=" * 50)
     print("🌤️  WeatherWise CLI Dashboard")
     print("=" * 50)
@@ -32,7 +43,8 @@ def main():
         
         # Validate city name
         if not validate_city_name(city):
-            print("❌ Error: Invalid city name. Please use only letters, spaces, and hyphens.")
+            print("❌ Error: Invalid city name. Please use letters (any language), spaces, "
+                  "hyphens, apostrophes, and periods.")
             print()
             continue
         
@@ -49,7 +61,7 @@ def main():
                 print(f"✅ Report generated: {report_path}")
             
             print()
-                
+        
         except ValueError as e:
             print(f"❌ Error: {e}")
             print()
@@ -66,62 +78,31 @@ def get_weather_data(city):
         city (str): Name of the city
         
     Returns:
-        dict: Weather data including temperature, conditions, humidity, etc.
+        WeatherRecord: Weather data including temperature, conditions, humidity, etc.
+            (numeric attributes, also readable as the legacy dict)
         
     Raises:
         ValueError: If city not found or API error
         requests.RequestException: If network error
     """
-    from config import API_KEY, BASE_URL, TIMEOUT
+    from config import API_KEY
+    from weather_client import get_default_client
     
     if not API_KEY:
         raise ValueError("API key not configured. Please set OPENWEATHER_API_KEY in .env file")
     
-    params = {
-        'q': city,
-        'appid': API_KEY,
-        'units': 'metric'  # Get data in Celsius
-    }
-    
-    try:
-        response = requests.get(BASE_URL, params=params, timeout=TIMEOUT)
-        
-        if response.status_code == 404:
-            raise ValueError(f"City '{city}' not found")
-        elif response.status_code == 401:
-            raise ValueError("Invalid API key")
-        
-        response.raise_for_status()
-        raw_data = response.json()
-        
-        # Parse and return weather data
-        return {
-            'city': raw_data['name'],
-            'country': raw_data['sys']['country'],
-            'temperature': f"{raw_data['main']['temp']:.1f}°C",
-            'feels_like': f"{raw_data['main']['feels_like']:.1f}°C",
-            'temp_kelvin': raw_data['main']['temp'] + 273.15,
-            'description': raw_data['weather'][0]['description'],
-            'icon': raw_data['weather'][0]['icon'],  # e.g., '01d' (day) or '01n' (night)
-            'humidity': raw_data['main']['humidity'],
-            'pressure': raw_data['main']['pressure'],
-            'wind_speed': raw_data['wind']['speed'],
-            'timestamp': datetime.fromtimestamp(raw_data['dt']).strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-    except requests.HTTPError as e:
-        if e.response.status_code == 404:
-            raise ValueError(f"City '{city}' not found")
-        elif e.response.status_code == 401:
-            raise ValueError("Invalid API key")
-        else:
-            raise ValueError(f"API error: {e}")
+    # Pooling, caching (config.CACHE_TTL), retries and history all live in
+    # the shared client core; one client per key so concurrent callers coalesce
+    return get_default_client(API_KEY).fetch_current(city)
 
 
 def format_temperature(temp, unit="celsius"):
     """
     Convert and format temperature values
     
+    For many readings at once, units.format_temperatures gives identical
+    strings in one vectorized pass.
+    
     Args:
         temp (float): Temperature in Kelvin
         unit (str): Target unit - 'celsius', 'fahrenheit', or 'kelvin'
@@ -155,18 +136,12 @@ def validate_city_name(city):
     Returns:
         bool: True if valid, False otherwise
     """
-    # City names can contain letters, spaces, hyphens, and apostrophes
-    # Examples: "New York", "Saint-Denis", "O'Fallon"
-    pattern = r"^[a-zA-Z\s\-']+$"
-    
-    if not city or len(city.strip()) < 2:
-        return False
-    
-    # Check if it's only whitespace
-    if city.isspace():
-        return False
+    from cities import is_valid_city
     
-    return bool(re.match(pattern, city))
+    # City names can contain letters from any script, spaces, hyphens,
+    # apostrophes and periods (precompiled, Unicode-aware pattern)
+    # Examples: "New York", "Saint-Denis", "O'Fallon", "São Paulo"
+    return is_valid_city(city)
 
 
 def display_weather(data):
@@ -174,7 +149,7 @@ def display_weather(data):
     Display weather data in formatted CLI output
     
     Args:
-        data (dict): Weather data dictionary
+        data (dict or WeatherRecord): Weather data
     """
     print()
     print("=" * 50)
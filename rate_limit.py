@@ -0,0 +1,210 @@
+"""
+Rate limiting module
+Token-bucket pacing and quota budgeting per OpenWeatherMap API key
+"""
+
+import asyncio
+import threading
+import time
+import config
+
+
+class QuotaExceededError(ValueError):
+    """Raised when a call would have to wait longer than allowed for budget"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+    
+    def __init__(self, rate, capacity, now):
+        """
+        Initialize a full TokenBucket
+        
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum tokens held (the allowed burst)
+            now (float): Current clock reading
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+    
+    def refill(self, now):
+        """Add the tokens accrued since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, n, now):
+        """Seconds until n tokens are available (after the bucket's debt clears)"""
+        self.refill(now)
+        deficit = n - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class RateLimiter:
+    """Thread-safe limiter combining a per-minute and a per-day budget"""
+    
+    def __init__(self, per_minute=None, per_day=None, burst=None, max_wait=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        Initialize RateLimiter (arguments default to config.RATE_LIMIT_*)
+        
+        Args:
+            per_minute (int): Sustained calls per minute (0 for no limit)
+            per_day (int): Calls per rolling day (0 for no limit)
+            burst (int): Calls allowed back-to-back before pacing applies
+            max_wait (float): Longest acceptable wait before raising
+            clock (callable): Monotonic time source
+            sleep (callable): Blocking sleep function
+        """
+        per_minute = config.RATE_LIMIT_PER_MINUTE if per_minute is None else per_minute
+        per_day = config.RATE_LIMIT_PER_DAY if per_day is None else per_day
+        burst = config.RATE_LIMIT_BURST if burst is None else burst
+        self.max_wait = config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        
+        now = clock()
+        self._buckets = {}
+        if per_minute:
+            self._buckets['minute'] = TokenBucket(per_minute / 60, min(burst or per_minute, per_minute), now)
+        if per_day:
+            self._buckets['day'] = TokenBucket(per_day / 86400, per_day, now)
+        
+        self.calls = 0
+        self.waited = 0.0
+    
+    def _reserve(self, max_wait=None):
+        """
+        Claim budget for one call
+        
+        Tokens are taken immediately (possibly going negative), so callers
+        queue up fairly and each gets its own wait time. A larger max_wait
+        only stretches how long a caller queues behind the per-minute budget;
+        waiting on the daily budget is always capped at self.max_wait, so
+        batches fail fast instead of sleeping for hours.
+        
+        Args:
+            max_wait (float): Longest acceptable wait (defaults to self.max_wait)
+            
+        Returns:
+            float: Seconds the caller must wait before sending
+            
+        Raises:
+            QuotaExceededError: If the wait would exceed max_wait
+        """
+        with self._lock:
+            now = self._clock()
+            waits = {name: b.wait_time(1, now) for name, b in self._buckets.items()}
+            wait = max(waits.values(), default=0.0)
+            day_wait = waits.get('day', 0.0)
+            if day_wait > self.max_wait:
+                raise QuotaExceededError(f"Daily rate limit budget exhausted (next call in {day_wait:.0f}s)")
+            if wait > (self.max_wait if max_wait is None else max_wait):
+                raise QuotaExceededError(f"Rate limit budget exhausted (next call in {wait:.0f}s)")
+            
+            for bucket in self._buckets.values():
+                bucket.tokens -= 1
+            self.calls += 1
+            self.waited += wait
+            return wait
+    
+    def acquire(self, max_wait=None):
+        """
+        Block until a call may be sent
+        
+        Args:
+            max_wait (float): Longest acceptable wait (defaults to self.max_wait;
+                batch jobs pass config.RATE_LIMIT_BATCH_MAX_WAIT)
+            
+        Raises:
+            QuotaExceededError: If budget won't be available within max_wait
+        """
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            self._sleep(wait)
+    
+    async def acquire_async(self, max_wait=None):
+        """
+        Wait without blocking the event loop until a call may be sent
+        
+        Args:
+            max_wait (float): Longest acceptable wait (defaults to self.max_wait)
+            
+        Raises:
+            QuotaExceededError: If budget won't be available within max_wait
+        """
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def remaining(self):
+        """
+        Report the budget available right now
+        
+        Returns:
+            dict: Whole calls left in each configured window ('minute', 'day')
+        """
+        with self._lock:
+            now = self._clock()
+            result = {}
+            for name, bucket in self._buckets.items():
+                bucket.refill(now)
+                result[name] = max(int(bucket.tokens), 0)
+            return result
+    
+    def estimate_seconds(self, n):
+        """
+        Estimate how long n more calls will take under the current budget
+        
+        Batch jobs can use this to size work so it finishes inside the quota.
+        
+        Args:
+            n (int): Number of calls planned
+            
+        Returns:
+            float: Seconds until the last of the n calls could be sent
+        """
+        with self._lock:
+            now = self._clock()
+            return max((b.wait_time(n, now) for b in self._buckets.values()), default=0.0)
+    
+    def stats(self):
+        """
+        Report limiter activity
+        
+        Returns:
+            dict: 'calls' admitted, total seconds 'waited' and 'remaining' budget
+        """
+        return {'calls': self.calls, 'waited': self.waited, 'remaining': self.remaining()}
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key):
+    """
+    Get the limiter shared by every client using an API key
+    
+    Args:
+        api_key (str): OpenWeatherMap API key
+        
+    Returns:
+        RateLimiter: Limiter built from config settings on first use
+    """
+    limiter = _limiters.get(api_key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(api_key)
+            if limiter is None:
+                limiter = _limiters[api_key] = RateLimiter()
+    return limiter
+
+
+def reset_rate_limiters():
+    """Forget all per-key limiters so they are rebuilt from config"""
+    with _limiters_lock:
+        _limiters.clear()
@@ -3,10 +3,26 @@ HTML Report Generator
 Creates beautiful weather reports with visualizations
 """
 
+import gzip
+import html
 import os
+import re
+import tempfile
+import time
+import uuid
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+from urllib.parse import quote
+import config
+import metrics
 from config import REPORTS_DIR
+from report_template import (
+    ICONS, ASSETS_DIR, STYLESHEET_FILE, SPRITE_FILE, REPORT_CSS, INDEX_CSS,
+    LINKED_STYLESHEET, BATCH_INDEX_TEMPLATE, build_sprite, get_template,
+    icon_name, report_fields, sprite_icon
+)
 
 
 def get_weather_icon(description, icon_code='01d'):
@@ -20,355 +36,325 @@ def get_weather_icon(description, icon_code='01d'):
     Returns:
         str: SVG icon HTML
     """
-    description = description.lower()
-    is_night = icon_code.endswith('n')
-    
-    if 'clear' in description:
-        if is_night:
-            # Moon icon for clear night
-            return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                <path d="M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z"></path>
-            </svg>'''
-        else:
-            # Sun icon for clear day
-            return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                <circle cx="12" cy="12" r="5"></circle>
-                <line x1="12" y1="1" x2="12" y2="3"></line>
-                <line x1="12" y1="21" x2="12" y2="23"></line>
-                <line x1="4.22" y1="4.22" x2="5.64" y2="5.64"></line>
-                <line x1="18.36" y1="18.36" x2="19.78" y2="19.78"></line>
-                <line x1="1" y1="12" x2="3" y2="12"></line>
-                <line x1="21" y1="12" x2="23" y2="12"></line>
-                <line x1="4.22" y1="19.78" x2="5.64" y2="18.36"></line>
-                <line x1="18.36" y1="5.64" x2="19.78" y2="4.22"></line>
-            </svg>'''
-    elif 'cloud' in description:
-        return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <path d="M18 10h-1.26A8 8 0 1 0 9 20h9a5 5 0 0 0 0-10z"></path>
-        </svg>'''
-    elif 'rain' in description:
-        return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <line x1="16" y1="13" x2="16" y2="21"></line>
-            <line x1="8" y1="13" x2="8" y2="21"></line>
-            <line x1="12" y1="15" x2="12" y2="23"></line>
-            <path d="M20 16.58A5 5 0 0 0 18 7h-1.26A8 8 0 1 0 4 15.25"></path>
-        </svg>'''
-    elif 'snow' in description:
-        return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <path d="M20 17.58A5 5 0 0 0 18 8h-1.26A8 8 0 1 0 4 16.25"></path>
-            <line x1="8" y1="16" x2="8.01" y2="16"></line>
-            <line x1="8" y1="20" x2="8.01" y2="20"></line>
-            <line x1="12" y1="18" x2="12.01" y2="18"></line>
-            <line x1="12" y1="22" x2="12.01" y2="22"></line>
-            <line x1="16" y1="16" x2="16.01" y2="16"></line>
-            <line x1="16" y1="20" x2="16.01" y2="20"></line>
-        </svg>'''
-    else:
-        return '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <path d="M17.5 19H9a7 7 0 1 1 6.71-9h1.79a4.5 4.5 0 1 1 0 9Z"></path>
-        </svg>'''
+    return ICONS[icon_name(description, icon_code)]
 
 
-def create_html_report(weather_data):
+def write_atomic(path, content):
     """
-    Generate HTML weather report
+    Write a text file so readers never see it half-written
+    
+    The content goes to a temporary file in the same directory which is
+    then renamed over the target in one step.
     
     Args:
-        weather_data (dict): Weather data dictionary
-        
-    Returns:
-        str: Path to generated HTML file
+        path (str): Destination file path
+        content (str or bytes): Text (written as UTF-8) or raw bytes
     """
-    # Ensure reports directory exists
-    os.makedirs(REPORTS_DIR, exist_ok=True)
-    
-    # Generate filename with timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"weather_report_{weather_data['city']}_{timestamp}.html"
-    filepath = os.path.join(REPORTS_DIR, filename)
+    start = time.perf_counter()
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
     
+    if metrics.enabled:
+        metrics.observe_stage('write', time.perf_counter() - start)
+        metrics.inc('weather_bytes_written_total', os.path.getsize(path))
+
+
+def _report_chunks(weather_data):
+    """Render a report as the compiled template's list of string chunks"""
     # Get weather icon (pass icon code for day/night detection)
     icon_code = weather_data.get('icon', '01d')
     weather_icon = get_weather_icon(weather_data['description'], icon_code)
+    return get_template().chunks(report_fields(weather_data, weather_icon))
+
+
+def render_html_report(weather_data):
+    """
+    Render a report in memory
     
-    # Generate HTML content
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Weather Report - {weather_data['city']}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        :root {{
-            --primary: #0ea5e9;
-            --primary-dark: #0284c7;
-            --secondary: #f97316;
-            --bg-gradient-start: #0f172a;
-            --bg-gradient-end: #1e3a5f;
-            --card-bg: rgba(255, 255, 255, 0.1);
-            --text-primary: #f8fafc;
-            --text-secondary: #94a3b8;
-        }}
-        
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Outfit', sans-serif;
-            background: linear-gradient(135deg, var(--bg-gradient-start) 0%, var(--bg-gradient-end) 100%);
-            min-height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 20px;
-            color: var(--text-primary);
-        }}
-        
-        .container {{
-            background: var(--card-bg);
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 24px;
-            box-shadow: 0 25px 50px -12px rgba(0, 0, 0, 0.5);
-            max-width: 900px;
-            width: 100%;
-            padding: 48px;
-            animation: fadeIn 0.6s ease-out;
-        }}
-        
-        @keyframes fadeIn {{
-            from {{
-                opacity: 0;
-                transform: translateY(20px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-        
-        .header {{
-            text-align: center;
-            margin-bottom: 40px;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5rem;
-            font-weight: 700;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--secondary) 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            margin-bottom: 8px;
-        }}
-        
-        .location {{
-            font-size: 1.25rem;
-            color: var(--text-secondary);
-            font-weight: 300;
-        }}
-        
-        .main-weather {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            gap: 48px;
-            margin: 48px 0;
-            padding: 40px;
-            background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
-            border-radius: 20px;
-            flex-wrap: wrap;
-        }}
-        
-        .weather-icon {{
-            color: white;
-            opacity: 0.9;
-            animation: pulse 2s ease-in-out infinite;
-        }}
-        
-        @keyframes pulse {{
-            0%, 100% {{ transform: scale(1); }}
-            50% {{ transform: scale(1.05); }}
-        }}
-        
-        .temperature-container {{
-            text-align: center;
-        }}
-        
-        .temperature {{
-            font-size: 5rem;
-            font-weight: 700;
-            line-height: 1;
-        }}
-        
-        .description {{
-            font-size: 1.5rem;
-            text-transform: capitalize;
-            opacity: 0.9;
-            margin-top: 8px;
-            font-weight: 300;
-        }}
-        
-        .details-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            gap: 20px;
-            margin-top: 32px;
-        }}
-        
-        .detail-card {{
-            background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            padding: 24px;
-            border-radius: 16px;
-            text-align: center;
-            transition: transform 0.3s ease, background 0.3s ease;
-        }}
-        
-        .detail-card:hover {{
-            transform: translateY(-4px);
-            background: rgba(255, 255, 255, 0.1);
-        }}
-        
-        .detail-card .label {{
-            color: var(--text-secondary);
-            font-size: 0.875rem;
-            margin-bottom: 8px;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        .detail-card .value {{
-            font-size: 1.75rem;
-            font-weight: 600;
-            color: var(--text-primary);
-        }}
-        
-        .detail-card .unit {{
-            font-size: 0.875rem;
-            color: var(--text-secondary);
-            font-weight: 400;
-        }}
-        
-        .timestamp-card {{
-            background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            padding: 16px 24px;
-            border-radius: 12px;
-            margin-top: 32px;
-            text-align: center;
-        }}
-        
-        .timestamp-card .label {{
-            color: var(--text-secondary);
-            font-size: 0.875rem;
-        }}
-        
-        .timestamp-card .value {{
-            color: var(--text-primary);
-            font-weight: 500;
-        }}
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
         
-        .footer {{
-            text-align: center;
-            margin-top: 40px;
-            padding-top: 24px;
-            border-top: 1px solid rgba(255, 255, 255, 0.1);
-        }}
+    Returns:
+        str: Complete HTML document
+    """
+    return ''.join(_report_chunks(weather_data))
+
+
+def render_report_bytes(weather_data):
+    """
+    Render a report as UTF-8 bytes, ready to send as an HTTP body
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
         
-        .footer p {{
-            color: var(--text-secondary);
-            font-size: 0.875rem;
-            margin: 4px 0;
-        }}
+    Returns:
+        bytes: Encoded HTML document
+    """
+    return render_html_report(weather_data).encode('utf-8')
+
+
+def iter_report_chunks(weather_data, chunk_size=16384):
+    """
+    Render a report as a sequence of encoded chunks
+    
+    Template pieces are gathered into chunks of about chunk_size bytes, so
+    a WSGI server or socket gets a few large writes rather than one per
+    field.
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
+        chunk_size (int): Target chunk size in bytes
         
-        .footer .brand {{
-            color: var(--primary);
-            font-weight: 600;
-        }}
+    Yields:
+        bytes: Consecutive pieces of the UTF-8 document
+    """
+    buffer = []
+    size = 0
+    for piece in _report_chunks(weather_data):
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream_html_report(weather_data, out, chunk_size=16384):
+    """
+    Write a report to a binary file-like object or socket without a temp file
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
+        out: Object with write() (files, BytesIO, wfile) or sendall() (sockets)
+        chunk_size (int): Target chunk size in bytes
         
-        @media (max-width: 600px) {{
-            .container {{
-                padding: 24px;
-            }}
-            
-            .header h1 {{
-                font-size: 1.75rem;
-            }}
-            
-            .temperature {{
-                font-size: 3.5rem;
-            }}
-            
-            .main-weather {{
-                padding: 24px;
-                gap: 24px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🌤️ Weather Report</h1>
-            <div class="location">{weather_data['city']}, {weather_data['country']}</div>
-        </div>
+    Returns:
+        int: Number of bytes written
+    """
+    send = getattr(out, 'sendall', None) or out.write
+    written = 0
+    for chunk in iter_report_chunks(weather_data, chunk_size):
+        send(chunk)
+        written += len(chunk)
+    return written
+
+
+def compress_report(data, encoding='gzip'):
+    """
+    Pre-compress a rendered report for serving with Content-Encoding
+    
+    Args:
+        data (bytes): Rendered report (see render_report_bytes)
+        encoding (str): 'gzip' or 'br' (brotli, needs the brotli package)
         
-        <div class="main-weather">
-            <div class="weather-icon">
-                {weather_icon}
-            </div>
-            <div class="temperature-container">
-                <div class="temperature">{weather_data['temperature']}</div>
-                <div class="description">{weather_data['description']}</div>
-            </div>
-        </div>
+    Returns:
+        bytes: Compressed body
         
-        <div class="details-grid">
-            <div class="detail-card">
-                <div class="label">Feels Like</div>
-                <div class="value">{weather_data['feels_like']}</div>
-            </div>
-            
-            <div class="detail-card">
-                <div class="label">Humidity</div>
-                <div class="value">{weather_data['humidity']}<span class="unit">%</span></div>
-            </div>
-            
-            <div class="detail-card">
-                <div class="label">Wind Speed</div>
-                <div class="value">{weather_data['wind_speed']}<span class="unit"> m/s</span></div>
-            </div>
-            
-            <div class="detail-card">
-                <div class="label">Pressure</div>
-                <div class="value">{weather_data['pressure']}<span class="unit"> hPa</span></div>
-            </div>
-        </div>
+    Raises:
+        ValueError: If the encoding is not supported
+    """
+    if encoding == 'gzip':
+        # mtime=0 keeps output byte-identical for identical reports
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    elif encoding == 'br':
+        try:
+            import brotli
+        except ImportError:
+            raise ValueError("Brotli compression requires the brotli package")
+        return brotli.compress(data, mode=brotli.MODE_TEXT)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def available_encodings():
+    """
+    List the pre-compression encodings usable in this environment
+    
+    Returns:
+        tuple: 'gzip', plus 'br' when brotli is installed
+    """
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return ('gzip',)
+    return ('gzip', 'br')
+
+
+def write_precompressed_report(weather_data, path, encodings=None):
+    """
+    Write a report alongside pre-compressed variants for static serving
+    
+    Produces path, path + '.gz' and (with brotli) path + '.br', which
+    servers such as nginx (gzip_static / brotli_static) send as-is.
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
+        path (str): Path of the uncompressed HTML file
+        encodings (tuple): Variants to write (defaults to available_encodings())
         
-        <div class="timestamp-card">
-            <span class="label">Last Updated: </span>
-            <span class="value">{weather_data['timestamp']}</span>
-        </div>
+    Returns:
+        list: Paths written, uncompressed first
+    """
+    data = render_report_bytes(weather_data)
+    suffixes = {'gzip': '.gz', 'br': '.br'}
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    write_atomic(path, data)
+    paths = [path]
+    for encoding in encodings or available_encodings():
+        compressed = compress_report(data, encoding)
+        variant = path + suffixes[encoding]
+        write_atomic(variant, compressed)
+        paths.append(variant)
+    return paths
+
+
+def create_html_report(weather_data, open_browser=None, reports_dir=None):
+    """
+    Generate HTML weather report
+    
+    The page skeleton is compiled once (see report_template); each call
+    only substitutes this report's fields. A report.html in
+    config.TEMPLATE_DIR replaces the built-in layout.
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
+        open_browser (bool): Open the report afterwards (defaults to
+            not config.HEADLESS)
+        reports_dir (str): Output directory (defaults to REPORTS_DIR)
         
-        <div class="footer">
-            <p>Created with <span class="brand">WeatherWise CLI Dashboard</span></p>
-            <p>Data provided by OpenWeatherMap API</p>
-        </div>
-    </div>
-</body>
-</html>"""
+    Returns:
+        str: Path to generated HTML file
+    """
+    if open_browser is None:
+        open_browser = not config.HEADLESS
+    reports_dir = reports_dir or REPORTS_DIR
+    
+    # Ensure reports directory exists
+    os.makedirs(reports_dir, exist_ok=True)
+    
+    # Generate filename with timestamp; the random suffix keeps reports for
+    # the same city in the same second from overwriting each other
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"weather_report_{weather_data['city']}_{timestamp}_{uuid.uuid4().hex[:8]}.html"
+    filepath = os.path.join(reports_dir, filename)
+    
+    # Generate HTML content
+    with metrics.stage('render'):
+        html_content = render_html_report(weather_data)
     
     # Write HTML file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    write_atomic(filepath, html_content)
     
     # Open the report in the default web browser
-    webbrowser.open('file://' + os.path.realpath(filepath))
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(filepath))
     
     return filepath
 
+
+def create_html_reports(weather_records, max_workers=None, use_processes=False):
+    """
+    Generate many reports in parallel without opening a browser
+    
+    Args:
+        weather_records (iterable): Weather data (dicts or WeatherRecords)
+        max_workers (int): Parallel workers (defaults to config.REPORT_WORKERS)
+        use_processes (bool): Render in worker processes so rendering scales
+            across cores; threads are enough when disk writes dominate
+        
+    Returns:
+        list: Report paths, in input order
+    """
+    max_workers = max_workers or config.REPORT_WORKERS
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    render_one = partial(create_html_report, open_browser=False, reports_dir=REPORTS_DIR)
+    
+    with executor_class(max_workers=max_workers) as executor:
+        return list(executor.map(render_one, weather_records, chunksize=64 if use_processes else 1))
+
+
+def _page_name(weather_data, used):
+    """
+    Build a stable, unique file name like 'são-paulo-br.html'
+    
+    Letters and digits in any script are kept as they are (no accent
+    stripping); everything else collapses to single hyphens.
+    """
+    slug = re.sub(r'[^\w]+', '-', f"{weather_data['city']}-{weather_data['country']}".casefold()).strip('-')
+    slug = slug or 'city'
+    name = f"{slug}.html"
+    n = 2
+    while name in used:
+        name = f"{slug}-{n}.html"
+        n += 1
+    used.add(name)
+    return name
+
+
+def create_batch_reports(weather_records, output_dir=None):
+    """
+    Generate reports for many cities sharing one stylesheet and icon sprite
+    
+    Writes assets/report.css and assets/icons.svg once, one small page per
+    city that links to them, and an index.html linking every page. Nothing
+    is opened in the browser.
+    
+    Args:
+        weather_records (iterable): Weather data (dicts or WeatherRecords)
+        output_dir (str): Directory to write into (defaults to a new
+            timestamped folder under REPORTS_DIR)
+        
+    Returns:
+        str: Path to the generated index.html
+    """
+    generated = datetime.now()
+    if output_dir is None:
+        output_dir = os.path.join(REPORTS_DIR, f"batch_{generated.strftime('%Y%m%d_%H%M%S')}")
+    assets_dir = os.path.join(output_dir, ASSETS_DIR)
+    os.makedirs(assets_dir, exist_ok=True)
+    
+    # Shared assets, written once per batch
+    write_atomic(os.path.join(assets_dir, STYLESHEET_FILE), REPORT_CSS + INDEX_CSS)
+    write_atomic(os.path.join(assets_dir, SPRITE_FILE), build_sprite())
+    
+    template = get_template(stylesheet=LINKED_STYLESHEET)
+    used = set()
+    rows = []
+    
+    for weather_data in weather_records:
+        name = _page_name(weather_data, used)
+        icon = sprite_icon(icon_name(weather_data['description'], weather_data.get('icon', '01d')))
+        
+        write_atomic(os.path.join(output_dir, name), template.render(report_fields(weather_data, icon)))
+        
+        rows.append(
+            f'            <li><a href="{quote(name)}"><span>{html.escape(weather_data["city"])}, '
+            f'{html.escape(weather_data["country"])}</span><span>{html.escape(weather_data["temperature"])}</span></a></li>'
+        )
+    
+    index_path = os.path.join(output_dir, 'index.html')
+    write_atomic(index_path, BATCH_INDEX_TEMPLATE.render({
+        'count': str(len(rows)),
+        'generated': generated.strftime('%Y-%m-%d %H:%M'),
+        'rows': '\n'.join(rows)
+    }))
+    
+    return index_path
@@ -0,0 +1,582 @@
+"""
+Report template module
+Pre-compiled HTML report skeleton with static CSS and SVG icons interned once
+"""
+
+import html
+import os
+import re
+import sys
+import threading
+from config import TEMPLATE_DIR
+
+
+# Stylesheet shared by every report
+REPORT_CSS = """        :root {
+            --primary: #0ea5e9;
+            --primary-dark: #0284c7;
+            --secondary: #f97316;
+            --bg-gradient-start: #0f172a;
+            --bg-gradient-end: #1e3a5f;
+            --card-bg: rgba(255, 255, 255, 0.1);
+            --text-primary: #f8fafc;
+            --text-secondary: #94a3b8;
+        }
+        
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Outfit', sans-serif;
+            background: linear-gradient(135deg, var(--bg-gradient-start) 0%, var(--bg-gradient-end) 100%);
+            min-height: 100vh;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            padding: 20px;
+            color: var(--text-primary);
+        }
+        
+        .container {
+            background: var(--card-bg);
+            backdrop-filter: blur(20px);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            border-radius: 24px;
+            box-shadow: 0 25px 50px -12px rgba(0, 0, 0, 0.5);
+            max-width: 900px;
+            width: 100%;
+            padding: 48px;
+            animation: fadeIn 0.6s ease-out;
+        }
+        
+        @keyframes fadeIn {
+            from {
+                opacity: 0;
+                transform: translateY(20px);
+            }
+            to {
+                opacity: 1;
+                transform: translateY(0);
+            }
+        }
+        
+        .header {
+            text-align: center;
+            margin-bottom: 40px;
+        }
+        
+        .header h1 {
+            font-size: 2.5rem;
+            font-weight: 700;
+            background: linear-gradient(135deg, var(--primary) 0%, var(--secondary) 100%);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            background-clip: text;
+            margin-bottom: 8px;
+        }
+        
+        .location {
+            font-size: 1.25rem;
+            color: var(--text-secondary);
+            font-weight: 300;
+        }
+        
+        .main-weather {
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            gap: 48px;
+            margin: 48px 0;
+            padding: 40px;
+            background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
+            border-radius: 20px;
+            flex-wrap: wrap;
+        }
+        
+        .weather-icon {
+            color: white;
+            opacity: 0.9;
+            animation: pulse 2s ease-in-out infinite;
+        }
+        
+        @keyframes pulse {
+            0%, 100% { transform: scale(1); }
+            50% { transform: scale(1.05); }
+        }
+        
+        .temperature-container {
+            text-align: center;
+        }
+        
+        .temperature {
+            font-size: 5rem;
+            font-weight: 700;
+            line-height: 1;
+        }
+        
+        .description {
+            font-size: 1.5rem;
+            text-transform: capitalize;
+            opacity: 0.9;
+            margin-top: 8px;
+            font-weight: 300;
+        }
+        
+        .details-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+            gap: 20px;
+            margin-top: 32px;
+        }
+        
+        .detail-card {
+            background: rgba(255, 255, 255, 0.05);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            padding: 24px;
+            border-radius: 16px;
+            text-align: center;
+            transition: transform 0.3s ease, background 0.3s ease;
+        }
+        
+        .detail-card:hover {
+            transform: translateY(-4px);
+            background: rgba(255, 255, 255, 0.1);
+        }
+        
+        .detail-card .label {
+            color: var(--text-secondary);
+            font-size: 0.875rem;
+            margin-bottom: 8px;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+        }
+        
+        .detail-card .value {
+            font-size: 1.75rem;
+            font-weight: 600;
+            color: var(--text-primary);
+        }
+        
+        .detail-card .unit {
+            font-size: 0.875rem;
+            color: var(--text-secondary);
+            font-weight: 400;
+        }
+        
+        .timestamp-card {
+            background: rgba(255, 255, 255, 0.05);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            padding: 16px 24px;
+            border-radius: 12px;
+            margin-top: 32px;
+            text-align: center;
+        }
+        
+        .timestamp-card .label {
+            color: var(--text-secondary);
+            font-size: 0.875rem;
+        }
+        
+        .timestamp-card .value {
+            color: var(--text-primary);
+            font-weight: 500;
+        }
+        
+        .footer {
+            text-align: center;
+            margin-top: 40px;
+            padding-top: 24px;
+            border-top: 1px solid rgba(255, 255, 255, 0.1);
+        }
+        
+        .footer p {
+            color: var(--text-secondary);
+            font-size: 0.875rem;
+            margin: 4px 0;
+        }
+        
+        .footer .brand {
+            color: var(--primary);
+            font-weight: 600;
+        }
+        
+        @media (max-width: 600px) {
+            .container {
+                padding: 24px;
+            }
+            
+            .header h1 {
+                font-size: 1.75rem;
+            }
+            
+            .temperature {
+                font-size: 3.5rem;
+            }
+            
+            .main-weather {
+                padding: 24px;
+                gap: 24px;
+            }
+        }
+"""
+
+# SVG icons, keyed by the names returned from icon_name()
+ICONS = {
+    'moon': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+                <path d="M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z"></path>
+            </svg>''',
+    'sun': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+                <circle cx="12" cy="12" r="5"></circle>
+                <line x1="12" y1="1" x2="12" y2="3"></line>
+                <line x1="12" y1="21" x2="12" y2="23"></line>
+                <line x1="4.22" y1="4.22" x2="5.64" y2="5.64"></line>
+                <line x1="18.36" y1="18.36" x2="19.78" y2="19.78"></line>
+                <line x1="1" y1="12" x2="3" y2="12"></line>
+                <line x1="21" y1="12" x2="23" y2="12"></line>
+                <line x1="4.22" y1="19.78" x2="5.64" y2="18.36"></line>
+                <line x1="18.36" y1="5.64" x2="19.78" y2="4.22"></line>
+            </svg>''',
+    'cloud': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <path d="M18 10h-1.26A8 8 0 1 0 9 20h9a5 5 0 0 0 0-10z"></path>
+        </svg>''',
+    'rain': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <line x1="16" y1="13" x2="16" y2="21"></line>
+            <line x1="8" y1="13" x2="8" y2="21"></line>
+            <line x1="12" y1="15" x2="12" y2="23"></line>
+            <path d="M20 16.58A5 5 0 0 0 18 7h-1.26A8 8 0 1 0 4 15.25"></path>
+        </svg>''',
+    'snow': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <path d="M20 17.58A5 5 0 0 0 18 8h-1.26A8 8 0 1 0 4 16.25"></path>
+            <line x1="8" y1="16" x2="8.01" y2="16"></line>
+            <line x1="8" y1="20" x2="8.01" y2="20"></line>
+            <line x1="12" y1="18" x2="12.01" y2="18"></line>
+            <line x1="12" y1="22" x2="12.01" y2="22"></line>
+            <line x1="16" y1="16" x2="16.01" y2="16"></line>
+            <line x1="16" y1="20" x2="16.01" y2="20"></line>
+        </svg>''',
+    'default': '''<svg xmlns="http://www.w3.org/2000/svg" width="80" height="80" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <path d="M17.5 19H9a7 7 0 1 1 6.71-9h1.79a4.5 4.5 0 1 1 0 9Z"></path>
+        </svg>''',
+}
+ICONS = {name: sys.intern(svg) for name, svg in ICONS.items()}
+
+# Page skeleton; {{ name }} marks a field. 'css' is filled in at compile time.
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Weather Report - {{ city }}</title>
+    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700&display=swap" rel="stylesheet">
+    {{ stylesheet }}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🌤️ Weather Report</h1>
+            <div class="location">{{ city }}, {{ country }}</div>
+        </div>
+        
+        <div class="main-weather">
+            <div class="weather-icon">
+                {{ weather_icon }}
+            </div>
+            <div class="temperature-container">
+                <div class="temperature">{{ temperature }}</div>
+                <div class="description">{{ description }}</div>
+            </div>
+        </div>
+        
+        <div class="details-grid">
+            <div class="detail-card">
+                <div class="label">Feels Like</div>
+                <div class="value">{{ feels_like }}</div>
+            </div>
+            
+            <div class="detail-card">
+                <div class="label">Humidity</div>
+                <div class="value">{{ humidity }}<span class="unit">%</span></div>
+            </div>
+            
+            <div class="detail-card">
+                <div class="label">Wind Speed</div>
+                <div class="value">{{ wind_speed }}<span class="unit"> m/s</span></div>
+            </div>
+            
+            <div class="detail-card">
+                <div class="label">Pressure</div>
+                <div class="value">{{ pressure }}<span class="unit"> hPa</span></div>
+            </div>
+        </div>
+        
+        <div class="timestamp-card">
+            <span class="label">Last Updated: </span>
+            <span class="value">{{ timestamp }}</span>
+        </div>
+        
+        <div class="footer">
+            <p>Created with <span class="brand">WeatherWise CLI Dashboard</span></p>
+            <p>Data provided by OpenWeatherMap API</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+INLINE_STYLESHEET = "<style>\n" + REPORT_CSS + "    </style>"
+
+# Batch mode: pages link to one shared stylesheet and icon sprite in assets/
+ASSETS_DIR = 'assets'
+STYLESHEET_FILE = 'report.css'
+SPRITE_FILE = 'icons.svg'
+LINKED_STYLESHEET = f'<link rel="stylesheet" href="{ASSETS_DIR}/{STYLESHEET_FILE}">'
+
+INDEX_CSS = """
+        .city-list {
+            list-style: none;
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(220px, 1fr));
+            gap: 12px;
+        }
+        
+        .city-list a {
+            display: flex;
+            justify-content: space-between;
+            padding: 16px 20px;
+            border-radius: 12px;
+            background: rgba(255, 255, 255, 0.05);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            color: var(--text-primary);
+            text-decoration: none;
+        }
+        
+        .city-list a:hover {
+            background: rgba(255, 255, 255, 0.1);
+        }
+"""
+
+_SVG_BODY = re.compile(r"<svg[^>]*>(.*)</svg>", re.S)
+
+
+def build_sprite():
+    """
+    Combine ICONS into one SVG sprite of <symbol> elements
+    
+    Returns:
+        str: Sprite document; reference icons as icons.svg#icon-<name>
+    """
+    symbols = [
+        f'    <symbol id="icon-{name}" viewBox="0 0 24 24">{_SVG_BODY.search(svg).group(1)}</symbol>'
+        for name, svg in ICONS.items()
+    ]
+    return '<svg xmlns="http://www.w3.org/2000/svg">\n' + '\n'.join(symbols) + '\n</svg>\n'
+
+
+def sprite_icon(name):
+    """
+    Get markup that draws an icon from the shared sprite
+    
+    Args:
+        name (str): Key into ICONS
+        
+    Returns:
+        str: Small <svg><use></svg> reference
+    """
+    return _SPRITE_REFS[name]
+
+
+_SPRITE_REFS = {
+    name: sys.intern(
+        '<svg width="80" height="80" fill="none" stroke="currentColor" stroke-width="2" '
+        'stroke-linecap="round" stroke-linejoin="round">'
+        f'<use href="{ASSETS_DIR}/{SPRITE_FILE}#icon-{name}"></use></svg>'
+    )
+    for name in ICONS
+}
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Weather Reports</title>
+    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700&display=swap" rel="stylesheet">
+    {{ stylesheet }}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🌤️ Weather Reports</h1>
+            <div class="location">{{ count }} cities · {{ generated }}</div>
+        </div>
+        
+        <ul class="city-list">
+{{ rows }}
+        </ul>
+        
+        <div class="footer">
+            <p>Created with <span class="brand">WeatherWise CLI Dashboard</span></p>
+            <p>Data provided by OpenWeatherMap API</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+_FIELD = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CompiledTemplate:
+    """Template split once into literal chunks and field slots"""
+    
+    __slots__ = ('parts', 'slots', 'fields')
+    
+    def __init__(self, text, static=None):
+        """
+        Compile template text
+        
+        Args:
+            text (str): Template with {{ name }} fields
+            static (dict): Field values known at compile time; they are
+                folded into the surrounding literal text
+        """
+        static = static or {}
+        pieces = _FIELD.split(text)
+        parts = [pieces[0]]
+        slots = []
+        
+        for i in range(1, len(pieces), 2):
+            name, literal = pieces[i], pieces[i + 1]
+            if name in static:
+                parts[-1] += static[name] + literal
+            else:
+                slots.append((len(parts), name))
+                parts.append(None)
+                parts.append(literal)
+        
+        self.parts = [sys.intern(part) if part is not None else None for part in parts]
+        self.slots = tuple(slots)
+        self.fields = frozenset(name for _, name in slots)
+    
+    def chunks(self, values):
+        """
+        Produce the rendered document piece by piece
+        
+        Args:
+            values (dict): Value for every field in self.fields
+            
+        Returns:
+            list: Literal and substituted string chunks, in order
+        """
+        out = self.parts[:]
+        for index, name in self.slots:
+            out[index] = values[name]
+        return out
+    
+    def render(self, values):
+        """
+        Render the template
+        
+        Args:
+            values (dict): Value for every field in self.fields
+            
+        Returns:
+            str: Rendered document
+        """
+        return ''.join(self.chunks(values))
+
+
+DEFAULT_TEMPLATE = CompiledTemplate(REPORT_TEMPLATE, static={'stylesheet': INLINE_STYLESHEET})
+BATCH_TEMPLATE = CompiledTemplate(REPORT_TEMPLATE, static={'stylesheet': LINKED_STYLESHEET})
+BATCH_INDEX_TEMPLATE = CompiledTemplate(INDEX_TEMPLATE, static={'stylesheet': LINKED_STYLESHEET})
+
+_custom_templates = {}
+_custom_lock = threading.Lock()
+
+
+def get_template(name='report.html', template_dir=None, stylesheet=INLINE_STYLESHEET):
+    """
+    Get the compiled report template
+    
+    A file with this name in config.TEMPLATE_DIR overrides the built-in
+    skeleton. It may use any of the built-in fields, plus {{ stylesheet }}
+    for the default inline styles. Custom templates are compiled once and
+    recompiled only when the file changes.
+    
+    Args:
+        name (str): Template file name
+        template_dir (str): Directory to look in (defaults to config.TEMPLATE_DIR)
+        stylesheet (str): Markup for {{ stylesheet }}: INLINE_STYLESHEET or
+            LINKED_STYLESHEET for batch pages
+        
+    Returns:
+        CompiledTemplate: Template ready to render
+    """
+    path = os.path.join(template_dir or TEMPLATE_DIR, name)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return BATCH_TEMPLATE if stylesheet is LINKED_STYLESHEET else DEFAULT_TEMPLATE
+    
+    cache_key = (path, stylesheet is LINKED_STYLESHEET)
+    cached = _custom_templates.get(cache_key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    with open(path, encoding='utf-8') as f:
+        template = CompiledTemplate(f.read(), static={'stylesheet': stylesheet})
+    with _custom_lock:
+        _custom_templates[cache_key] = (mtime, template)
+    return template
+
+
+def icon_name(description, icon_code='01d'):
+    """
+    Pick the icon for a weather description and time of day
+    
+    Args:
+        description (str): Weather description
+        icon_code (str): OpenWeatherMap icon code (e.g., '01d' for day, '01n' for night)
+        
+    Returns:
+        str: Key into ICONS
+    """
+    description = description.lower()
+    
+    if 'clear' in description:
+        return 'moon' if icon_code.endswith('n') else 'sun'
+    elif 'cloud' in description:
+        return 'cloud'
+    elif 'rain' in description:
+        return 'rain'
+    elif 'snow' in description:
+        return 'snow'
+    else:
+        return 'default'
+
+
+def report_fields(weather_data, weather_icon):
+    """
+    Build the field values for one report
+    
+    Args:
+        weather_data (dict or WeatherRecord): Weather data
+        weather_icon (str): Icon markup to embed
+        
+    Returns:
+        dict: Escaped values keyed by template field name
+    """
+    escape = html.escape
+    return {
+        'city': escape(weather_data['city']),
+        'country': escape(weather_data['country']),
+        'weather_icon': weather_icon,
+        'temperature': escape(weather_data['temperature']),
+        'description': escape(weather_data['description']),
+        'feels_like': escape(weather_data['feels_like']),
+        'humidity': str(weather_data['humidity']),
+        'wind_speed': str(weather_data['wind_speed']),
+        'pressure': str(weather_data['pressure']),
+        'timestamp': escape(weather_data['timestamp'])
+    }
@@ -0,0 +1,302 @@
+"""
+Retry module
+Exponential backoff with jitter and a circuit breaker for upstream calls
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import config
+import metrics
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of calling an upstream that is known to be down"""
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header
+    
+    Args:
+        value (str): Header value, either seconds or an HTTP date
+        
+    Returns:
+        float: Seconds to wait, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter"""
+    
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None, rng=random.random):
+        """
+        Initialize RetryPolicy (arguments default to config.RETRY_*)
+        
+        Args:
+            max_attempts (int): Total tries including the first
+            base_delay (float): Backoff ceiling for the first retry, in seconds
+            max_delay (float): Cap on any single wait, in seconds
+            rng (callable): Source of uniform [0, 1) values for jitter
+        """
+        self.max_attempts = config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._rng = rng
+    
+    def delay(self, attempt, retry_after=None):
+        """
+        Compute the wait before the next attempt
+        
+        Args:
+            attempt (int): Zero-based index of the attempt that just failed
+            retry_after (float): Server-requested wait, if any
+            
+        Returns:
+            float: Seconds to wait, or None if the server asked for longer
+                than max_delay and retrying is pointless
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return self._rng() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+
+class CircuitBreaker:
+    """Fast-fails calls for a cool-down period after repeated upstream failures"""
+    
+    def __init__(self, name='openweathermap', failure_threshold=None, cooldown=None, clock=time.monotonic):
+        """
+        Initialize a closed CircuitBreaker (arguments default to config.BREAKER_*)
+        
+        Args:
+            name (str): Upstream name, used in metric names
+            failure_threshold (int): Consecutive failures that open the circuit
+            cooldown (float): Seconds to stay open before allowing a probe
+            clock (callable): Monotonic time source
+        """
+        self.name = name
+        self.failure_threshold = config.BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.cooldown = config.BREAKER_COOLDOWN if cooldown is None else cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+    
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge(f'{self.name}_circuit_state', _STATE_VALUES[state])
+    
+    def before_call(self):
+        """
+        Check whether a call may go upstream
+        
+        After the cool-down a single probe call is let through; its outcome
+        closes or re-opens the circuit.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            
+            remaining = self.opened_at + self.cooldown - self._clock()
+            if self.state == OPEN and remaining <= 0:
+                self._set_state(HALF_OPEN)
+            
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        
+        metrics.inc(f'{self.name}_circuit_rejected_total')
+        raise CircuitOpenError(f"Weather service unavailable, retrying in {max(remaining, 0):.0f}s")
+    
+    def record_success(self):
+        """Note a call that reached a healthy upstream"""
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+    
+    def cancel_probe(self):
+        """Release a half-open probe slot after a call ended without a verdict"""
+        with self._lock:
+            self._probing = False
+    
+    def record_failure(self):
+        """Note an upstream failure (timeout, connection error or 5xx)"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                    metrics.inc(f'{self.name}_circuit_opens_total')
+                self.opened_at = self._clock()
+                self._set_state(OPEN)
+    
+    def stats(self):
+        """
+        Report breaker state
+        
+        Returns:
+            dict: 'state', consecutive 'failures' and number of 'opens'
+        """
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'opens': self.opens}
+
+
+def _status_code(response):
+    return response.status_code
+
+
+def _retry_after(response):
+    return response.headers.get('Retry-After')
+
+
+def _next_delay(policy, breaker, attempt, status, retry_after):
+    """Shared decision logic: delay before retrying a response, or None to stop"""
+    if status >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    
+    if status not in RETRY_STATUSES or attempt + 1 >= policy.max_attempts:
+        return None
+    return policy.delay(attempt, parse_retry_after(retry_after) if status == 429 else None)
+
+
+def call_with_retry(send, policy, breaker, retry_on=(), status_of=_status_code,
+                    retry_after_of=_retry_after, sleep=None):
+    """
+    Call send() with retries, backoff and circuit breaking
+    
+    Responses with a retryable status (429, 5xx) are retried until attempts
+    run out, then returned to the caller for normal error handling.
+    
+    Args:
+        send (callable): Makes one attempt and returns a response
+        policy (RetryPolicy): Backoff settings
+        breaker (CircuitBreaker): Breaker guarding the upstream
+        retry_on (tuple): Exception types that count as transient failures
+        status_of (callable): Extracts the HTTP status from a response
+        retry_after_of (callable): Extracts the Retry-After header from a response
+        sleep (callable): Blocking sleep function (defaults to time.sleep)
+        
+    Returns:
+        The last response
+        
+    Raises:
+        CircuitOpenError: If the circuit is open
+    """
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            response = send()
+        except retry_on:
+            breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.delay(attempt)
+        except BaseException:
+            breaker.cancel_probe()
+            raise
+        else:
+            delay = _next_delay(policy, breaker, attempt, status_of(response), retry_after_of(response))
+            if delay is None:
+                return response
+        
+        metrics.inc('weather_retries_total')
+        (sleep or time.sleep)(delay)
+        attempt += 1
+
+
+async def async_call_with_retry(send, policy, breaker, retry_on=(), status_of=_status_code,
+                                retry_after_of=_retry_after):
+    """
+    Await send() with retries, backoff and circuit breaking
+    
+    Same behaviour as call_with_retry, but send is a coroutine function and
+    backoff waits do not block the event loop.
+    
+    Returns:
+        The last response
+        
+    Raises:
+        CircuitOpenError: If the circuit is open
+    """
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            response = await send()
+        except retry_on:
+            breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.delay(attempt)
+        except BaseException:
+            breaker.cancel_probe()
+            raise
+        else:
+            delay = _next_delay(policy, breaker, attempt, status_of(response), retry_after_of(response))
+            if delay is None:
+                return response
+        
+        metrics.inc('weather_retries_total')
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name='openweathermap'):
+    """
+    Get the breaker shared by every client talking to an upstream
+    
+    Args:
+        name (str): Upstream name
+        
+    Returns:
+        CircuitBreaker: Breaker built from config settings on first use
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def reset_circuit_breakers():
+    """Forget all breakers so they are rebuilt, closed, from config"""
+    with _breakers_lock:
+        _breakers.clear()
@@ -5,11 +5,72 @@ Tests core functionality with mock data
 CS50P Final Project
 """
 
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
+import requests
+import config
+import http_pool
+from cache import TTLCache, TieredCache, make_key, get_default_cache, reset_default_cache
+from disk_cache import DiskCache
+from rate_limit import RateLimiter, QuotaExceededError, reset_rate_limiters
+from retry import RetryPolicy, CircuitBreaker, CircuitOpenError, reset_circuit_breakers
+import metrics
+import json_codec
+import units
+import cities
+from city_index import CityIndex, reset_default_index
+from weather_client import (WeatherClient, SessionTransport, RecordingTransport, ReplayTransport,
+                            Reply, reset_default_clients)
+from weather_api import WeatherAPI
+from async_weather_api import AsyncWeatherAPI
+from forecast import Forecast
+from models import WeatherRecord
+from observation_store import ObservationStore, get_default_store, reset_default_store
+import comparison_report
+import batch_cli
+import project
+import benchmark
+from fake_server import FakeWeatherServer
+import report_generator
+from report_template import CompiledTemplate, get_template
 from project import get_weather_data, format_temperature, validate_city_name
 from unittest.mock import patch, Mock
 
 
+@pytest.fixture(autouse=True)
+def reset_shared_state(monkeypatch):
+    """Keep shared state, and the developer's own cache, history and city list, out of tests"""
+    monkeypatch.setattr(config, 'RATE_LIMIT_PER_MINUTE', 0)
+    monkeypatch.setattr(metrics, 'enabled', False)
+    # raising=False keeps unresolved settings lazy (and .env unread) on undo
+    for name in ('DISK_CACHE_PATH', 'HISTORY_DB_PATH', 'CITY_LIST_PATH'):
+        monkeypatch.setattr(config, name, "", raising=False)
+    
+    def reset():
+        # Rebuilt from the patched config, never cleared, so real files are untouched
+        reset_default_cache()
+        reset_default_store()
+        reset_default_index()
+        reset_rate_limiters()
+        reset_circuit_breakers()
+        reset_default_clients()
+    
+    reset()
+    yield
+    reset()
+
+
 def test_format_temperature():
     """Test temperature conversion functionality"""
     # Test Celsius conversion
@@ -53,14 +114,14 @@ def test_validate_city_name():
     assert validate_city_name("123") == False  # Only numbers
 
 
-@patch('project.requests.get')
+@patch('http_pool.get_session')
 @patch('config.API_KEY', 'test_api_key')
-def test_get_weather_data(mock_get):
+def test_get_weather_data(mock_get_session):
     """Test weather data fetching with mocked API response"""
     # Create mock response for successful request
     mock_response = Mock()
     mock_response.status_code = 200
-    mock_response.json.return_value = {
+    mock_response.content = json.dumps({
         'name': 'London',
         'sys': {'country': 'GB'},
         'main': {
@@ -72,8 +133,8 @@ def test_get_weather_data(mock_get):
         'weather': [{'description': 'clear sky', 'icon': '01d'}],
         'wind': {'speed': 5.5},
         'dt': 1609459200
-    }
-    mock_get.return_value = mock_response
+    }).encode()
+    mock_get_session.return_value.get.return_value = mock_response
     
     # Test successful data fetch
     result = get_weather_data("London")
@@ -85,14 +146,14 @@ def test_get_weather_data(mock_get):
     assert result['description'] == 'clear sky'
 
 
-@patch('project.requests.get')
+@patch('http_pool.get_session')
 @patch('config.API_KEY', 'test_api_key')
-def test_get_weather_data_city_not_found(mock_get):
+def test_get_weather_data_city_not_found(mock_get_session):
     """Test weather data fetching when city is not found"""
     # Create mock response for 404 error
     mock_response = Mock()
     mock_response.status_code = 404
-    mock_get.return_value = mock_response
+    mock_get_session.return_value.get.return_value = mock_response
     
     with pytest.raises(ValueError, match="not found"):
         get_weather_data("InvalidCityXYZ123")
@@ -127,3 +188,1108 @@ def test_validate_city_name_edge_cases():
     assert validate_city_name("L") == False
 
 
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 handler that keeps connections open"""
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_pooled_session_reuses_connections():
+    """Test that the pooled session keeps connections alive between requests"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    
+    try:
+        session = http_pool.create_session(pool_maxsize=2)
+        for _ in range(5):
+            assert session.get(url, timeout=5).json() == {'ok': True}
+        
+        stats = http_pool.pool_stats(session)
+        assert stats['requests'] == 5
+        assert stats['misses'] == 1
+        assert stats['hits'] == 4
+        session.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _weather_payload(name):
+    """Build a minimal OpenWeatherMap current-weather payload"""
+    return {
+        'name': name,
+        'sys': {'country': 'XX'},
+        'main': {'temp': 20.0, 'feels_like': 18.5, 'humidity': 65, 'pressure': 1013},
+        'weather': [{'description': 'clear sky', 'icon': '01d'}],
+        'wind': {'speed': 5.5},
+        'dt': 1609459200
+    }
+
+
+def _fake_session(delay=0.0, missing=()):
+    """Session stand-in that answers every city after an optional delay"""
+    def fake_get(url, params=None, timeout=None):
+        time.sleep(delay)
+        response = Mock()
+        if params['q'] in missing:
+            response.status_code = 404
+        else:
+            response.status_code = 200
+            response.content = json.dumps(_weather_payload(params['q'])).encode()
+        return response
+    
+    session = Mock()
+    session.get.side_effect = fake_get
+    return session
+
+
+def test_fetch_many_collects_results_and_errors():
+    """Test that one failing city does not fail the whole batch"""
+    api = WeatherAPI(api_key='test_api_key', session=_fake_session(missing={'Atlantis'}))
+    
+    results, errors = api.fetch_many(["London", "Atlantis", "Paris", "London"])
+    
+    assert sorted(results) == ["London", "Paris"]
+    assert results['Paris']['city'] == 'Paris'
+    assert list(errors) == ["Atlantis"]
+    assert isinstance(errors['Atlantis'], ValueError)
+
+
+def test_fetch_many_runs_concurrently():
+    """Test that batch wall time tracks the slowest request, not the sum"""
+    api = WeatherAPI(api_key='test_api_key', session=_fake_session(delay=0.2))
+    cities = [f"City{i}" for i in range(10)]
+    
+    start = time.perf_counter()
+    results, errors = api.fetch_many(cities, max_workers=10)
+    elapsed = time.perf_counter() - start
+    
+    assert len(results) == 10 and not errors
+    assert elapsed < 1.0
+
+
+class _FakeAsyncResponse:
+    """aiohttp-style response context manager"""
+    
+    def __init__(self, status, payload, delay, tracker):
+        self.status = status
+        self.headers = {}
+        self._payload = payload
+        self._delay = delay
+        self._tracker = tracker
+    
+    async def __aenter__(self):
+        self._tracker['active'] += 1
+        self._tracker['peak'] = max(self._tracker['peak'], self._tracker['active'])
+        await asyncio.sleep(self._delay)
+        return self
+    
+    async def __aexit__(self, *args):
+        self._tracker['active'] -= 1
+    
+    async def read(self):
+        return json.dumps(self._payload).encode()
+
+
+class _FakeAsyncSession:
+    """aiohttp-style session that answers every city after a delay"""
+    
+    def __init__(self, delay=0.0, statuses=None):
+        self.delay = delay
+        self.statuses = statuses or {}
+        self.tracker = {'active': 0, 'peak': 0}
+    
+    def get(self, url, params=None):
+        status = self.statuses.get(params['q'], 200)
+        return _FakeAsyncResponse(status, _weather_payload(params['q']), self.delay, self.tracker)
+
+
+def test_async_fetch_matches_blocking_semantics():
+    """Test that the async client parses and raises like WeatherAPI"""
+    session = _FakeAsyncSession(statuses={'Atlantis': 404, 'Denied': 401})
+    api = AsyncWeatherAPI(api_key='test_api_key', session=session)
+    
+    result = asyncio.run(api.fetch_current_weather("London"))
+    assert result['city'] == 'London'
+    assert result['temperature'] == '20.0°C'
+    
+    with pytest.raises(ValueError, match="not found"):
+        asyncio.run(api.fetch_current_weather("Atlantis"))
+    with pytest.raises(ValueError, match="Invalid API key"):
+        asyncio.run(api.fetch_current_weather("Denied"))
+
+
+def test_async_fetch_many_caps_in_flight():
+    """Test that the semaphore bounds concurrent async lookups"""
+    session = _FakeAsyncSession(delay=0.01)
+    api = AsyncWeatherAPI(api_key='test_api_key', session=session, max_in_flight=5)
+    cities = [f"City{i}" for i in range(50)]
+    
+    results, errors = asyncio.run(api.fetch_many(cities))
+    
+    assert len(results) == 50 and not errors
+    assert session.tracker['peak'] == 5
+    assert session.tracker['active'] == 0
+
+
+@patch('async_weather_api.TIMEOUT', 0.05)
+def test_async_fetch_timeout_releases_slot():
+    """Test that a timed-out lookup raises and frees its semaphore slot"""
+    api = AsyncWeatherAPI(api_key='test_api_key', session=_FakeAsyncSession(delay=1), max_in_flight=1,
+                          retry=RetryPolicy(max_attempts=1))
+    
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await api.fetch_current_weather("London")
+        assert not api.transport._get_semaphore().locked()
+    
+    asyncio.run(run())
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    """Test TTL expiry, LRU eviction order and statistics"""
+    now = [0.0]
+    cache = TTLCache(ttl=60, max_entries=2, clock=lambda: now[0])
+    
+    cache.set(make_key("London"), 'london')
+    cache.set(make_key("Paris"), 'paris')
+    assert cache.get(make_key("  LONDON ")) == 'london'  # Normalized key, now most recent
+    
+    cache.set(make_key("Tokyo"), 'tokyo')  # Evicts Paris, the least recently used
+    assert cache.get(make_key("Paris")) is None
+    assert cache.get(make_key("Tokyo")) == 'tokyo'
+    
+    now[0] = 61
+    assert cache.get(make_key("London")) is None  # Expired
+    
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'evictions': 1, 'expirations': 1, 'size': 1}
+
+
+@patch('http_pool.get_session')
+@patch('config.API_KEY', 'test_api_key')
+def test_get_weather_data_uses_cache(mock_get_session):
+    """Test that repeat lookups are served without another request"""
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = json.dumps(_weather_payload('London')).encode()
+    mock_get_session.return_value.get.return_value = mock_response
+    
+    first = get_weather_data("London")
+    second = get_weather_data("london")
+    
+    assert first == second
+    assert mock_get_session.return_value.get.call_count == 1
+    assert get_default_cache().stats()['hits'] == 1
+
+
+@patch('http_pool.get_session')
+@patch('config.API_KEY', 'test_api_key')
+def test_get_weather_data_coalesces_concurrent_callers(mock_get_session):
+    """Test that threads asking for one city share a single upstream call"""
+    mock_get_session.return_value = _fake_session(delay=0.2)
+    
+    threads = [threading.Thread(target=get_weather_data, args=("London",)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert mock_get_session.return_value.get.call_count == 1
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    """Test that a second cache on the same file sees fresh entries only"""
+    now = [1000.0]
+    path = str(tmp_path / "cache" / "weather.sqlite3")
+    writer = DiskCache(path, ttl=60, clock=lambda: now[0])
+    reader = DiskCache(path, ttl=60, clock=lambda: now[0])
+    
+    writer.set(make_key("London"), {'city': 'London', 'humidity': 65})
+    assert reader.get(make_key("london")) == {'city': 'London', 'humidity': 65}
+    
+    now[0] += 61
+    assert reader.get(make_key("London")) is None
+    assert writer.prune() == 1
+    assert reader.stats() == {'hits': 1, 'misses': 1, 'size': 0}
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    """Test that disk hits are copied into memory for the remaining TTL"""
+    now = [1000.0]
+    disk = DiskCache(str(tmp_path / "weather.sqlite3"), ttl=60, clock=lambda: now[0])
+    disk.set(make_key("Paris"), {'city': 'Paris'})
+    
+    now[0] += 50
+    memory = TTLCache(ttl=60, clock=lambda: now[0])
+    tiered = TieredCache(memory, disk)
+    assert tiered.get(make_key("Paris")) == {'city': 'Paris'}
+    assert memory.get(make_key("Paris")) == {'city': 'Paris'}
+    
+    now[0] += 11  # Past the original fetch time + TTL
+    assert memory.get(make_key("Paris")) is None
+
+
+def test_async_client_keeps_disk_cache_io_off_the_loop(tmp_path, monkeypatch):
+    """Test that the async client reads and writes the disk tier from worker threads"""
+    disk = DiskCache(str(tmp_path / "weather.sqlite3"))
+    threads = []
+    for name in ('get_entry', 'set'):
+        method = getattr(disk, name)
+        
+        def recorded(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+        
+        monkeypatch.setattr(disk, name, recorded)
+    
+    async def run():
+        loop_thread = threading.get_ident()
+        api = AsyncWeatherAPI(api_key='test_api_key', session=_FakeAsyncSession(),
+                              cache=TieredCache(TTLCache(), disk), store=False)
+        fetched = await api.fetch_current_weather("Lima")
+        api.cache = TieredCache(TTLCache(), disk)  # Cold memory tier, warm disk
+        cached = await api.fetch_current_weather("Lima")
+        return loop_thread, fetched, cached
+    
+    loop_thread, fetched, cached = asyncio.run(run())
+    
+    assert cached == fetched
+    assert len(threads) == 3  # Miss, write, then a disk hit
+    assert loop_thread not in threads
+
+
+def test_concurrent_lookups_are_coalesced():
+    """Test that concurrent threads asking for one city share a request"""
+    session = _fake_session(delay=0.2, missing={'Atlantis'})
+    api = WeatherAPI(api_key='test_api_key', session=session, cache=False)
+    
+    results, errors = [], []
+    def lookup(city):
+        try:
+            results.append(api.fetch_current_weather(city))
+        except ValueError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=lookup, args=(city,)) for city in ["London"] * 8 + ["Atlantis"] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(results) == 8 and all(r['city'] == 'London' for r in results)
+    assert len(errors) == 4
+    assert session.get.call_count == 2
+
+
+def test_async_concurrent_lookups_are_coalesced():
+    """Test that concurrent tasks asking for one city share a request"""
+    session = _FakeAsyncSession(delay=0.05)
+    api = AsyncWeatherAPI(api_key='test_api_key', session=session, cache=False)
+    
+    async def run():
+        return await asyncio.gather(*(api.fetch_current_weather("Tokyo") for _ in range(20)))
+    
+    results = asyncio.run(run())
+    
+    assert all(r['city'] == 'Tokyo' for r in results)
+    assert api._async_flight.stats() == {'calls': 1, 'shared': 19}
+
+
+def test_rate_limiter_paces_bursts_and_enforces_quota():
+    """Test burst allowance, pacing waits and the daily budget"""
+    now = [0.0]
+    sleeps = []
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    
+    limiter = RateLimiter(per_minute=60, per_day=5, burst=2, max_wait=10,
+                          clock=lambda: now[0], sleep=fake_sleep)
+    assert limiter.remaining() == {'minute': 2, 'day': 5}
+    
+    for _ in range(4):
+        limiter.acquire()
+    assert sleeps == [pytest.approx(1.0), pytest.approx(1.0)]  # Burst of 2, then 1/s
+    assert limiter.remaining() == {'minute': 0, 'day': 1}
+    assert limiter.estimate_seconds(1) == pytest.approx(1.0)
+    assert limiter.estimate_seconds(3) > 10  # Would need tomorrow's budget
+    
+    limiter.acquire()
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire()  # Daily budget needs hours to refill
+    assert limiter.stats()['calls'] == 5
+    
+    # Batches may queue without limit behind the per-minute budget, but not the daily one
+    now[0] += 86400
+    sleeps.clear()
+    for _ in range(5):
+        limiter.acquire(max_wait=float('inf'))
+    with pytest.raises(QuotaExceededError, match="Daily"):
+        limiter.acquire(max_wait=float('inf'))
+    assert max(sleeps) < 10
+
+
+def test_rate_limiter_shared_across_threads():
+    """Test that concurrent callers queue behind one shared budget"""
+    limiter = RateLimiter(per_minute=600, burst=1, per_day=0)
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # One call goes immediately, the other three wait 0.1s each in turn
+    assert time.perf_counter() - start >= 0.29
+    assert limiter.stats()['waited'] == pytest.approx(0.6, abs=0.01)
+
+
+def test_batch_lookups_wait_for_rate_limit_budget(monkeypatch):
+    """Test that batches queue for budget instead of failing past max_wait"""
+    monkeypatch.setattr(config, 'RATE_LIMIT_PER_MINUTE', 6000)
+    monkeypatch.setattr(config, 'RATE_LIMIT_BURST', 2)
+    monkeypatch.setattr(config, 'RATE_LIMIT_MAX_WAIT', 0.05)
+    names = [f"City {i}" for i in range(30)]
+    
+    api = AsyncWeatherAPI(api_key='async_key', session=_FakeAsyncSession(), cache=False, store=False)
+    results, errors = asyncio.run(api.fetch_many(names))
+    assert not errors and len(results) == 30
+    
+    session = _fake_session()
+    api = WeatherAPI(api_key='blocking_key', session=session, cache=False, store=False)
+    results, errors = api.fetch_many(names, max_workers=10)
+    assert not errors and session.get.call_count == 30
+
+
+def _scripted_session(*outcomes):
+    """Session stand-in returning the given statuses (or raising exceptions) in order"""
+    def fake_get(url, params=None, timeout=None):
+        outcome = outcomes[min(fake_get.calls, len(outcomes) - 1)]
+        fake_get.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        response = Mock()
+        response.status_code = status
+        response.headers = headers
+        response.content = json.dumps(_weather_payload(params['q'])).encode()
+        if status >= 400:
+            http_error = requests.HTTPError(f"{status} Server Error")
+            http_error.response = response
+            response.raise_for_status.side_effect = http_error
+        return response
+    
+    fake_get.calls = 0
+    session = Mock()
+    session.get.side_effect = fake_get
+    return session
+
+
+@patch('retry.time.sleep')
+def test_retry_recovers_from_transient_failures(mock_sleep):
+    """Test that timeouts and 5xx are retried and Retry-After is honored"""
+    metrics.reset()
+    session = _scripted_session(requests.Timeout("slow"), (429, {'Retry-After': '2'}), 200)
+    api = WeatherAPI(api_key='test_api_key', session=session, cache=False,
+                     retry=RetryPolicy(max_attempts=3, base_delay=0.1), breaker=CircuitBreaker())
+    
+    assert api.fetch_current_weather("London")['city'] == 'London'
+    assert session.get.call_count == 3
+    assert mock_sleep.call_args_list[1].args == (2.0,)
+    assert metrics.snapshot()['counters']['weather_retries_total'] == 2
+
+
+@patch('retry.time.sleep')
+def test_circuit_breaker_fast_fails_until_cooldown(mock_sleep):
+    """Test that repeated 5xx open the circuit and a probe closes it again"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30, clock=lambda: now[0])
+    session = _scripted_session(503, 503, 200)
+    api = WeatherAPI(api_key='test_api_key', session=session, cache=False,
+                     retry=RetryPolicy(max_attempts=2, base_delay=0), breaker=breaker)
+    
+    with pytest.raises(ValueError, match="API error"):
+        api.fetch_current_weather("London")
+    assert breaker.stats() == {'state': 'open', 'failures': 2, 'opens': 1}
+    
+    with pytest.raises(CircuitOpenError):
+        api.fetch_current_weather("London")
+    assert session.get.call_count == 2  # No request while open
+    
+    now[0] = 31
+    assert api.fetch_current_weather("London")['city'] == 'London'
+    assert breaker.stats()['state'] == 'closed'
+
+
+def _forecast_payload(steps=12, start=1609459200, tz_offset=3600):
+    """Build a /forecast payload with 3-hourly steps starting at midnight UTC"""
+    return {
+        'city': {'name': 'Paris', 'country': 'FR', 'timezone': tz_offset},
+        'list': [
+            {
+                'dt': start + i * 10800,
+                'main': {'temp': float(i), 'humidity': 50 + i, 'pressure': 1000 + i},
+                'wind': {'speed': i / 2}
+            }
+            for i in range(steps)
+        ]
+    }
+
+
+def test_fetch_forecast_returns_columns():
+    """Test that the forecast is parsed into typed columns"""
+    session = Mock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.content = json.dumps(_forecast_payload()).encode()
+    api = WeatherAPI(api_key='test_api_key', session=session)
+    
+    forecast = api.fetch_forecast("Paris")
+    
+    assert session.get.call_args.args[0] == config.FORECAST_URL
+    assert forecast.city == 'Paris' and len(forecast) == 12
+    assert forecast.timestamps.typecode == 'q'
+    assert list(forecast.temp[:3]) == [0.0, 1.0, 2.0]
+
+
+def test_forecast_daily_rollups():
+    """Test per-day min/max/mean in the city's local time"""
+    forecast = Forecast.from_api(_forecast_payload())
+    
+    # UTC+1: steps 0-7 (00:00-21:00 UTC) fall on Jan 1 local time
+    with patch('forecast.np', None):
+        daily = forecast.daily()
+    
+    assert daily['date'] == ['2021-01-01', '2021-01-02']
+    assert list(daily['temp_min']) == [0.0, 8.0]
+    assert list(daily['temp_max']) == [7.0, 11.0]
+    assert list(daily['temp_mean']) == [3.5, 9.5]
+    assert list(daily['humidity_max']) == [57.0, 61.0]
+    assert forecast.daily() == daily  # NumPy path, when installed, agrees
+
+
+def test_weather_record_numeric_fields_and_dict_view():
+    """Test that records keep raw numbers and still read like the legacy dict"""
+    record = WeatherRecord.from_api(_weather_payload('London'))
+    
+    assert record.temp == 20.0 and record.feels_like == 18.5
+    assert record.dt == 1609459200
+    assert record.temp_kelvin == pytest.approx(293.15)
+    assert not hasattr(record, '__dict__')
+    
+    assert record['temperature'] == '20.0°C'
+    assert record['feels_like'] == '18.5°C'
+    assert record.get('icon', '01n') == '01d'
+    assert record.get('missing') is None
+    assert list(record) == list(WeatherRecord.KEYS)
+    assert record.to_dict()['humidity'] == 65
+    assert record == record.to_dict()
+
+
+def test_disk_cache_round_trips_records(tmp_path):
+    """Test that records persist with their numeric fields intact"""
+    cache = DiskCache(str(tmp_path / "weather.sqlite3"), ttl=60)
+    record = WeatherRecord.from_api(_weather_payload('Lima'))
+    
+    cache.set(make_key("Lima"), record)
+    restored = cache.get(make_key("Lima"))
+    
+    assert isinstance(restored, WeatherRecord)
+    assert restored == record
+
+
+def test_compiled_template_folds_static_fields():
+    """Test that static fields are baked in and only dynamic ones remain"""
+    template = CompiledTemplate("<style>{{ css }}</style><h1>{{ city }}</h1>{{city}}", static={'css': 'p{}'})
+    
+    assert template.fields == {'city'}
+    assert template.parts[0] == '<style>p{}</style><h1>'
+    assert template.render({'city': 'Oslo'}) == '<style>p{}</style><h1>Oslo</h1>Oslo'
+
+
+@patch('report_generator.webbrowser.open')
+def test_create_html_report_renders_fields(mock_open, tmp_path):
+    """Test the built-in report layout and HTML escaping"""
+    record = WeatherRecord.from_api(_weather_payload('London'))
+    record.description = 'light <rain>'
+    
+    with patch('report_generator.REPORTS_DIR', str(tmp_path)):
+        path = report_generator.create_html_report(record)
+    html = open(path, encoding='utf-8').read()
+    
+    assert '<title>Weather Report - London</title>' in html
+    assert '<div class="temperature">20.0°C</div>' in html
+    assert 'light &lt;rain&gt;' in html
+    assert '--primary: #0ea5e9;' in html
+    mock_open.assert_called_once()
+
+
+def test_custom_template_from_template_dir(tmp_path):
+    """Test that report.html in the template directory overrides the layout"""
+    (tmp_path / "report.html").write_text("<p>{{ city }}: {{ temperature }}</p>", encoding='utf-8')
+    
+    template = get_template(template_dir=str(tmp_path))
+    assert template is get_template(template_dir=str(tmp_path))  # Compiled once
+    assert template.render({'city': 'Rome', 'temperature': '25.0°C'}) == '<p>Rome: 25.0°C</p>'
+    assert get_template(template_dir=str(tmp_path / "missing")) is not template
+
+
+def test_create_batch_reports_share_assets(tmp_path):
+    """Test that batch pages link shared assets and the index links every page"""
+    records = [WeatherRecord.from_api(_weather_payload(city)) for city in ["London", "São Paulo", "London"]]
+    
+    index_path = report_generator.create_batch_reports(records, str(tmp_path))
+    
+    assert sorted(p.name for p in (tmp_path / "assets").iterdir()) == ['icons.svg', 'report.css']
+    page = (tmp_path / "london-xx.html").read_text(encoding='utf-8')
+    assert '<link rel="stylesheet" href="assets/report.css">' in page
+    assert 'assets/icons.svg#icon-sun' in page
+    assert '<style>' not in page
+    assert 'id="icon-sun"' in (tmp_path / "assets" / "icons.svg").read_text(encoding='utf-8')
+    
+    index = open(index_path, encoding='utf-8').read()
+    assert 'href="london-xx.html"' in index and 'href="london-xx-2.html"' in index
+    assert 'href="s%C3%A3o-paulo-xx.html"' in index
+    assert (tmp_path / "são-paulo-xx.html").exists()
+
+
+@patch('report_generator.webbrowser.open')
+def test_headless_reports_do_not_collide(mock_open, tmp_path):
+    """Test headless mode and unique names for same-second reports"""
+    record = WeatherRecord.from_api(_weather_payload('London'))
+    
+    with patch('report_generator.REPORTS_DIR', str(tmp_path)), patch('config.HEADLESS', True):
+        first = report_generator.create_html_report(record)
+        second = report_generator.create_html_report(record)
+    
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(second)
+    mock_open.assert_not_called()
+
+
+@patch('report_generator.webbrowser.open')
+def test_create_html_reports_in_parallel(mock_open, tmp_path):
+    """Test that parallel report generation writes every report atomically"""
+    records = [WeatherRecord.from_api(_weather_payload(f"City{i}")) for i in range(20)]
+    
+    with patch('report_generator.REPORTS_DIR', str(tmp_path)):
+        paths = report_generator.create_html_reports(records, max_workers=4)
+    
+    assert [os.path.basename(p).split('_')[2] for p in paths] == [f"City{i}" for i in range(20)]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths)  # No temp files left
+    mock_open.assert_not_called()
+
+
+@patch('report_generator.webbrowser.open')
+def test_report_output_targets_match_file(mock_open, tmp_path):
+    """Test that in-memory and streamed output equal the written report"""
+    record = WeatherRecord.from_api(_weather_payload('Berlin'))
+    with patch('report_generator.REPORTS_DIR', str(tmp_path)):
+        expected = open(report_generator.create_html_report(record), 'rb').read()
+    
+    assert report_generator.render_report_bytes(record) == expected
+    
+    buffer = io.BytesIO()
+    assert report_generator.stream_html_report(record, buffer) == len(expected)
+    assert buffer.getvalue() == expected
+    
+    sent = []
+    sock = Mock(spec=['sendall'])
+    sock.sendall.side_effect = sent.append
+    report_generator.stream_html_report(record, sock, chunk_size=1024)
+    assert b''.join(sent) == expected and len(sent) > 1
+
+
+def test_write_precompressed_report(tmp_path):
+    """Test that gzip variants are written next to the HTML file"""
+    record = WeatherRecord.from_api(_weather_payload('Madrid'))
+    path = str(tmp_path / "madrid.html")
+    
+    paths = report_generator.write_precompressed_report(record, path, encodings=('gzip',))
+    
+    assert paths == [path, path + '.gz']
+    with open(path + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == open(path, 'rb').read()
+    if 'br' not in report_generator.available_encodings():
+        with pytest.raises(ValueError, match="brotli"):
+            report_generator.compress_report(b'<html>', 'br')
+
+
+def _observations(city, start, count, step=600):
+    """Build records for one city every step seconds, temp rising 1°C each"""
+    records = []
+    for i in range(count):
+        payload = _weather_payload(city)
+        payload['dt'] = start + i * step
+        payload['main']['temp'] = float(i)
+        records.append(WeatherRecord.from_api(payload))
+    return records
+
+
+def test_observation_store_range_query(tmp_path):
+    """Test appends, de-duplication and columnar range queries"""
+    store = ObservationStore(str(tmp_path / "history.sqlite3"))
+    records = _observations("Oslo", 1000000, 12) + _observations("Lima", 1000000, 3)
+    
+    assert store.append_many(records) == 15
+    assert store.append_many(records[:2]) == 0  # Same city and time already stored
+    assert store.cities() == ['Lima', 'Oslo']
+    
+    result = store.query("oslo", start=1000000 + 1200, end=1000000 + 3000, columns=('temp', 'humidity'))
+    assert list(result) == ['dt', 'temp', 'humidity']
+    assert result['dt'].typecode == 'q'
+    assert list(result['temp']) == [2.0, 3.0, 4.0]
+    
+    with pytest.raises(ValueError):
+        store.query("Oslo", columns=('temp; DROP TABLE observations',))
+
+
+def test_observation_store_downsample(tmp_path):
+    """Test per-bucket aggregation inside SQLite"""
+    store = ObservationStore(str(tmp_path / "history.sqlite3"))
+    store.append_many(_observations("Oslo", 3600 * 100, 12))  # Two hours of 10-minute readings
+    
+    hourly = store.downsample("Oslo", 3600, columns=('temp',))
+    
+    assert list(hourly['dt']) == [3600 * 100, 3600 * 101]
+    assert list(hourly['count']) == [6, 6]
+    assert list(hourly['temp']) == [2.5, 8.5]
+    assert list(hourly['temp_min']) == [0.0, 6.0]
+    assert list(hourly['temp_max']) == [5.0, 11.0]
+
+
+def test_weather_api_records_history(tmp_path):
+    """Test that fetched observations are appended to the store"""
+    store = ObservationStore(str(tmp_path / "history.sqlite3"))
+    api = WeatherAPI(api_key='test_api_key', session=_fake_session(), store=store)
+    
+    api.fetch_many(["Quito", "Accra"])
+    
+    assert store.cities() == ['Accra', 'Quito']
+
+
+def test_batch_history_is_written_in_batches(tmp_path, monkeypatch):
+    """Test that batches commit history in chunks, and async ones off the loop"""
+    monkeypatch.setattr('weather_client.HISTORY_BATCH_SIZE', 10)
+    store = ObservationStore(str(tmp_path / "history.sqlite3"))
+    writes = []
+    append_many = store.append_many
+    
+    def recording_append_many(records):
+        records = list(records)
+        writes.append((len(records), threading.get_ident()))
+        return append_many(records)
+    
+    monkeypatch.setattr(store, 'append_many', recording_append_many)
+    
+    api = WeatherAPI(api_key='test_api_key', session=_fake_session(), cache=False, store=store)
+    api.fetch_many([f"City {i}" for i in range(25)])
+    assert [size for size, _ in writes] == [10, 10, 5]
+    
+    writes.clear()
+    loop_thread = []
+    
+    async def run():
+        loop_thread.append(threading.get_ident())
+        api = AsyncWeatherAPI(api_key='test_api_key', session=_FakeAsyncSession(), cache=False, store=store)
+        return await api.fetch_many([f"Town {i}" for i in range(25)])
+    
+    results, errors = asyncio.run(run())
+    assert not errors and len(results) == 25
+    assert sorted(size for size, _ in writes) == [5, 10, 10]
+    assert all(thread != loop_thread[0] for _, thread in writes)
+    assert len(store.cities()) == 50
+
+
+def test_comparison_report_payload_and_charts():
+    """Test the aggregated payload, summary and charts of the dashboard"""
+    records = []
+    for i, city in enumerate(["Cairo", "Oslo", "</script><b>x"]):
+        payload = _weather_payload(city)
+        payload['main']['temp'] = 10.0 * i
+        records.append(WeatherRecord.from_api(payload))
+    history = {'Oslo': {'dt': array('q', [0, 3600]), 'temp': array('d', [1.0, 2.0])}}
+    
+    html = comparison_report.render_comparison_report(records, history=history)
+    
+    raw = html.split('<script type="application/json" id="data">')[1].split('</script>')[0]
+    data = json.loads(raw)
+    assert data['city'][:2] == ['Cairo', 'Oslo'] and data['temp'] == [0.0, 10.0, 20.0]
+    assert '</script><b>' not in raw
+    assert '10.0<span class="unit"> °C avg</span>' in html
+    assert html.count('<polyline') == 1
+    assert sum(comparison_report.histogram(array('d', [0.0, 10.0, 20.0]), 0.0, 20.0)) == 3
+
+
+def test_cli_import_is_lazy_and_fast():
+    """Benchmark importing project: no network stack, .env or warnings at import"""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import project\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('requests', 'urllib3', 'dotenv') if m in sys.modules]\n"
+        "start = time.perf_counter()\n"
+        "import requests\n"
+        "baseline = time.perf_counter() - start\n"
+        "print(elapsed, baseline)\n"
+        "print(','.join(heavy))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    timings, heavy = (result.stdout.splitlines() + [''])[:2]
+    elapsed, baseline = map(float, timings.split())
+    
+    print(f"import project: {elapsed * 1000:.1f} ms (import requests: {baseline * 1000:.1f} ms)")
+    assert heavy == ''
+    # Relative to the network stack it defers, so a loaded machine slows both
+    assert elapsed < baseline
+    assert "WARNING" not in result.stdout
+
+
+def test_instrumented_modules_do_not_load_env_at_import():
+    """Test that metrics resolves its setting on first use, not at import"""
+    script = (
+        "import sys\n"
+        "import report_generator, weather_client, retry, metrics, config\n"
+        "print('dotenv' in sys.modules, 'METRICS_ENABLED' in vars(config))\n"
+        "metrics.enabled\n"
+        "print('METRICS_ENABLED' in vars(config))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ['False', 'False', 'True']
+
+
+def test_config_settings_resolve_on_first_use(monkeypatch):
+    """Test that environment-backed settings are read lazily"""
+    monkeypatch.setenv("WEATHERWISE_HEADLESS", "yes")
+    monkeypatch.delitem(vars(config), 'HEADLESS', raising=False)
+    
+    assert 'HEADLESS' not in vars(config)
+    assert config.HEADLESS is True
+    assert vars(config).pop('HEADLESS') is True  # Cached after first access
+
+
+def test_run_batch_streams_ndjson():
+    """Test that batch mode validates, fetches and emits one line per city"""
+    api = WeatherAPI(api_key='test_api_key', session=_fake_session(missing={'Atlantis'}))
+    lines = io.StringIO("London\n# comment\n\nLondon123\nAtlantis\nParis\n")
+    out = io.StringIO()
+    
+    counts = batch_cli.run_batch(lines, batch_cli.NDJSONWriter(out), workers=2, api=api)
+    
+    rows = {row['query']: row for row in map(json.loads, out.getvalue().splitlines())}
+    assert counts == {'ok': 2, 'failed': 2}
+    assert sorted(rows) == ['Atlantis', 'London', 'London123', 'Paris']
+    assert rows['London']['ok'] is True and rows['London']['temp'] == 20.0
+    assert rows['London123'] == {'query': 'London123', 'ok': False, 'error': 'Invalid city name'}
+    assert "not found" in rows['Atlantis']['error']
+
+
+@patch('http_pool.get_session')
+@patch('config.API_KEY', 'test_api_key')
+def test_batch_main_writes_csv_and_reports(mock_get_session, tmp_path):
+    """Test the batch entry point end to end with CSV output and headless reports"""
+    mock_get_session.return_value = _fake_session()
+    (tmp_path / "cities.txt").write_text("Tokyo\nLima\n", encoding='utf-8')
+    output = tmp_path / "out.csv"
+    
+    with patch('report_generator.REPORTS_DIR', str(tmp_path / "reports")), \
+            patch('report_generator.webbrowser.open') as mock_open:
+        status = batch_cli.main([str(tmp_path / "cities.txt"), "--format", "csv",
+                                 "--output", str(output), "--reports"])
+    
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert status == 0
+    assert sorted(row['city'] for row in rows) == ['Lima', 'Tokyo']
+    assert all(os.path.exists(row['report']) for row in rows)
+    mock_open.assert_not_called()
+
+
+def test_batch_arguments_are_validated(tmp_path, capsys):
+    """Test that bad batch input exits with a usage error instead of a traceback"""
+    for argv in (["--batch", str(tmp_path / "missing.txt")], ["--batch", "-w", "0"],
+                 ["--batch", "-o", str(tmp_path / "no" / "such" / "dir.csv")]):
+        with pytest.raises(SystemExit) as exit_info:
+            batch_cli.parse_args(argv)
+        assert exit_info.value.code == 2
+    
+    with patch.object(sys, 'argv', ["project.py", "London"]), pytest.raises(SystemExit) as exit_info:
+        project.main()
+    assert exit_info.value.code == 2
+    assert "--batch" in capsys.readouterr().err
+
+
+def test_replay_transport_serves_blocking_and_async_clients(tmp_path):
+    """Test that one client core parses recorded replies the same way sync and async"""
+    recorder = RecordingTransport(SessionTransport(_fake_session(missing={'Atlantis'})))
+    client = WeatherClient(api_key='test_api_key', transport=recorder, cache=False)
+    live = client.fetch_current("London")
+    with pytest.raises(ValueError, match="not found"):
+        client.fetch_current("Atlantis")
+    recorder.save(tmp_path / "fixtures.json")
+    
+    replay = ReplayTransport.load(tmp_path / "fixtures.json")
+    client = WeatherClient(api_key='test_api_key', transport=replay, cache=False)
+    assert client.fetch_current("  london ") == live
+    assert asyncio.run(client.fetch_current_async("London")) == live
+    with pytest.raises(ValueError, match="not found"):
+        asyncio.run(client.fetch_current_async("Atlantis"))
+    
+    replay = ReplayTransport({'Paris': _weather_payload('Paris'), 'Lima': (500, None)})
+    api = AsyncWeatherAPI(api_key='test_api_key', transport=replay, cache=False,
+                          retry=RetryPolicy(max_attempts=1))
+    results, errors = asyncio.run(api.fetch_many(["Paris", "Lima"]))
+    assert results['Paris']['city'] == 'Paris'
+    assert str(errors['Lima']) == "API error: 500 for city 'Lima'"
+
+
+@pytest.mark.parametrize('backend', ['default', 'stdlib'])
+def test_json_codec_decodes_bytes_and_records_time(backend, monkeypatch):
+    """Test that response bytes decode with either backend and decode time is reported"""
+    metrics.reset()
+    monkeypatch.setattr(metrics, 'enabled', True)
+    body = json.dumps(_forecast_payload()).encode()
+    
+    with patch('json_codec._loads', json.loads if backend == 'stdlib' else json_codec._loads):
+        forecast = Forecast.from_api(json_codec.loads(body))
+    
+    snapshot = metrics.snapshot()
+    decode = snapshot['histograms']['weather_stage_seconds{stage="decode"}']
+    assert forecast.city == 'Paris' and len(forecast.temp) == 12
+    assert decode['count'] == 1 and decode['sum'] > 0
+    assert snapshot['counters']['weather_json_decoded_bytes_total'] == len(body)
+    with pytest.raises(ValueError):
+        json_codec.loads(b'<html>Bad Gateway</html>')
+
+
+def test_benchmark_leaves_user_cache_and_history_alone(tmp_path, monkeypatch):
+    """Test that benchmark runs use a private cache and store"""
+    monkeypatch.setattr(config, 'DISK_CACHE_PATH', str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(config, 'HISTORY_DB_PATH', str(tmp_path / "history.sqlite3"))
+    reset_default_cache()
+    get_default_cache().set(make_key("Mine"), {'city': 'Mine'})
+    
+    with FakeWeatherServer() as server, benchmark.pointed_at(server):
+        assert get_weather_data("Bench City").city == "Bench City"
+        assert get_default_store() is None
+    
+    reset_default_cache()
+    assert DiskCache(config.DISK_CACHE_PATH).get(make_key("Mine")) == {'city': 'Mine'}
+    assert get_default_store().cities() == []
+
+
+def test_benchmark_smoke_against_fake_server():
+    """Test that the benchmark suite runs end to end and reports every figure"""
+    report = benchmark.run_benchmarks(requests=20, concurrency=4, reports=5, throttle_every=7)
+    
+    results = report['results']
+    assert set(results) == {'get_weather_data', 'fetch_current_weather', 'fetch_forecast',
+                            'fetch_current_weather_cached', 'create_html_report',
+                            'fetch_many', 'fetch_many_grouped'}
+    assert all(r['errors'] == 0 and r['ops_per_sec'] > 0 for r in results.values())
+    assert results['fetch_many_grouped']['upstream_requests'] < results['fetch_many']['upstream_requests']
+    assert set(results['fetch_forecast']['latency_ms']) == {'p50', 'p95', 'p99', 'max'}
+    assert results['create_html_report']['reports_per_sec'] > 0
+    assert report['meta']['server']['statuses']['429'] > 0
+    assert {'ttfb', 'decode', 'parse', 'render', 'write'} <= set(report['stages'])
+    assert config.BASE_URL.startswith("https://api.openweathermap.org")
+    assert config.GROUP_URL.startswith("https://api.openweathermap.org")
+    json.dumps(report)
+
+
+def test_stage_metrics_cover_pipeline_and_export_prometheus(tmp_path, monkeypatch):
+    """Test per-stage timings from connect to file write, hooks and the text export"""
+    metrics.reset()
+    monkeypatch.setattr(metrics, 'enabled', True)
+    events = []
+    
+    def hook(kind, name, value, labels):
+        events.append((kind, name, dict(labels)))
+    
+    metrics.add_hook(hook)
+    
+    try:
+        with FakeWeatherServer() as server:
+            monkeypatch.setattr(config, 'BASE_URL', server.weather_url)
+            api = WeatherAPI(api_key='test_api_key', session=http_pool.create_session(), store=False)
+            record = api.fetch_current_weather("Oslo")
+            api.fetch_current_weather("Oslo")
+            api.session.close()
+        report_generator.create_html_report(record, open_browser=False, reports_dir=str(tmp_path))
+    finally:
+        metrics.remove_hook(hook)
+    
+    snapshot = metrics.snapshot()
+    stages = {key.split('"')[1] for key in snapshot['histograms']}
+    assert stages == {'connect', 'ttfb', 'decode', 'parse', 'render', 'write'}
+    assert snapshot['counters']['weather_cache_hits_total'] == 1
+    assert snapshot['counters']['weather_cache_misses_total'] == 1
+    assert snapshot['counters']['weather_bytes_written_total'] > 1000
+    assert ('histogram', 'weather_stage_seconds', {'stage': 'render'}) in events
+    
+    metrics.write_prometheus(str(tmp_path / "metrics.prom"))
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "# TYPE weather_stage_seconds histogram" in text
+    assert 'weather_stage_seconds_bucket{stage="decode",le="+Inf"} 1' in text
+    assert "weather_cache_hits_total 1" in text
+    
+    exporter = metrics.serve(port=0)
+    try:
+        response = requests.get(f"http://127.0.0.1:{exporter.server_address[1]}/metrics", timeout=5)
+        assert response.status_code == 200 and "weather_stage_seconds_count" in response.text
+    finally:
+        exporter.shutdown()
+        exporter.server_close()
+
+
+def test_metrics_disabled_records_nothing_on_hot_path():
+    """Test that disabled instrumentation is a shared no-op"""
+    metrics.reset()
+    
+    assert metrics.stage('parse') is metrics.stage('render')
+    with metrics.stage('parse'):
+        json_codec.loads(b'{"a": 1}')
+    metrics.observe_stage('ttfb', 0.1)
+    
+    assert metrics.snapshot() == {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_bulk_temperature_conversion_matches_format_temperature(use_numpy):
+    """Test that the vectorized path converts and formats exactly like the scalar one"""
+    if use_numpy and units.np is None:
+        pytest.skip("numpy not installed")
+    kelvin = array('d', [0.0, 233.15, 273.1, 273.15, 273.2, 273.25, 273.35, 293.65, 310.15, 1e20])
+    
+    with patch('units.np', units.np if use_numpy else None):
+        for unit in ("celsius", "fahrenheit", "kelvin"):
+            assert units.format_temperatures(kelvin, unit) == [format_temperature(t, unit) for t in kelvin]
+        celsius = units.convert_temperatures(kelvin, "celsius")
+        assert isinstance(celsius, array) and celsius[3] == 0.0
+        assert list(units.convert_temperatures(celsius, "kelvin", from_unit="celsius")) == \
+            [WeatherRecord('X', 'XX', t, t, '', '', 0, 0, 0, 0).temp_kelvin for t in celsius]
+        assert units.format_temperatures([-0.04, 21.0], from_unit="celsius") == ['-0.0°C', '21.0°C']
+        assert units.format_temperatures([]) == []
+        with pytest.raises(ValueError, match="Invalid unit"):
+            units.format_temperatures(kelvin, "rankine")
+
+
+def test_city_names_unicode_validation_and_canonical_keys():
+    """Test Unicode-aware validation and that spellings share one canonical key"""
+    for name in ("São Paulo", "Zürich", "Zürich", "Kraków", "St. Louis", "東京", "मुंबई", "Dún Laoghaire"):
+        assert validate_city_name(name) == True, name
+    for name in ("London123", "London@City", "Ab_c", "A", "  ", "Paris²"):
+        assert validate_city_name(name) == False, name
+    
+    assert cities.city_key("  ZÜRICH ") == cities.city_key("zürich") == "zürich"
+    assert make_key("São  Paulo") == make_key("são paulo")
+    
+    unique, invalid = cities.normalize_cities(
+        ["São Paulo", " sao paulo", "SÃO  PAULO", "Zürich", "Lima1", "zürich"])
+    assert unique == {'são paulo': 'São Paulo', 'sao paulo': 'sao paulo', 'zürich': 'Zürich'}
+    assert invalid == ["Lima1"]
+
+
+def test_fetch_many_fetches_each_spelling_once():
+    """Test that fetch_many collapses spellings of one city into one lookup"""
+    session = _fake_session()
+    api = WeatherAPI(api_key='test_api_key', session=session, cache=False)
+    
+    results, errors = api.fetch_many(["Zürich", "ZÜRICH", " zürich ", "Zürich", "Oslo"])
+    
+    assert not errors
+    assert sorted(results) == sorted(["Zürich", "ZÜRICH", " zürich ", "Oslo"])
+    assert results["ZÜRICH"] is results["Zürich"]
+    assert session.get.call_count == 2
+    assert session.get.call_args_list[0].kwargs['params']['q'] == "Zürich"
+
+
+def test_city_index_loads_lists_and_resolves_unique_names(tmp_path):
+    """Test ID lookups from JSON and CSV city lists, including ambiguous names"""
+    entries = [
+        {'id': 2988507, 'name': "Paris", 'country': "FR"},
+        {'id': 4717560, 'name': "Paris", 'country': "US"},
+        {'id': 2657896, 'name': "Zürich", 'country': "CH"},
+        {'id': 3143244, 'name': "Oslo", 'country': "NO"}
+    ]
+    json_path = tmp_path / "city.list.json.gz"
+    with gzip.open(json_path, 'wt', encoding='utf-8') as f:
+        json.dump(entries, f)
+    csv_path = tmp_path / "cities.csv"
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'name', 'country'])
+        writer.writeheader()
+        writer.writerows(entries)
+    
+    for path in (json_path, csv_path):
+        index = CityIndex.load(str(path))
+        assert len(index) == 4
+        assert index.lookup("  ZÜRICH ") == 2657896
+        assert index.lookup("Oslo") == 3143244
+        assert index.lookup("Paris") is None
+        assert index.lookup("Paris", "fr") == 2988507
+        assert index.lookup("Paris,US") == 4717560
+        assert index.lookup("Atlantis") is None
+
+
+def test_fetch_many_uses_group_requests_for_indexed_cities():
+    """Test that indexed cities share /group requests and the rest go by name"""
+    names = [f"City {i}" for i in range(1, 26)]
+    index = CityIndex((i, name, 'XX') for i, name in enumerate(names, 1))
+    
+    with FakeWeatherServer(city_names={i: name for i, name in enumerate(names[:-1], 1)}) as server:
+        with patch.object(config, 'BASE_URL', server.weather_url), \
+                patch.object(config, 'GROUP_URL', server.group_url):
+            api = WeatherAPI(api_key='test_api_key', session=requests.Session(), store=False,
+                             city_index=index)
+            results, errors = api.fetch_many(names + ["Unindexed", "city 3"])
+            assert api.fetch_current_weather("CITY 7") is results["City 7"]
+            api.session.close()
+    
+    assert sorted(results) == sorted(names[:-1] + ["Unindexed", "city 3"])
+    assert results["City 3"] is results["city 3"]
+    assert results["City 3"]['city'] == "City 3"
+    assert "City 25" in str(errors["City 25"]) and "not found" in str(errors["City 25"])
+    # 25 indexed cities in two group requests, plus one by-name request
+    assert sum(server.statuses.values()) == 3
+
+
+def test_fetch_many_group_entry_errors_stay_per_city():
+    """Test that one malformed group entry fails only its own city"""
+    good = dict(_weather_payload("Lima"), id=1)
+    bad = dict(_weather_payload("Nowhere"), id=2)
+    del bad['sys']  # OpenWeatherMap omits this for some city IDs
+    
+    transport = Mock(retry_on=())
+    transport.get.return_value = Reply(200, {'cnt': 2, 'list': [good, bad]}, None)
+    index = CityIndex([(1, "Lima", "PE"), (2, "Nowhere", "XX")])
+    api = WeatherAPI(api_key='test_api_key', transport=transport, cache=False, store=False,
+                     city_index=index)
+    
+    results, errors = api.fetch_many(["Lima", "Nowhere"])
+    
+    assert list(results) == ["Lima"] and list(errors) == ["Nowhere"]
+    assert transport.get.call_args.args[1] == {'id': '1,2', 'appid': 'test_api_key', 'units': 'metric'}
@@ -0,0 +1,176 @@
+"""
+Units module
+Bulk temperature conversion and formatting for large series of readings
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to a comprehension over array('d')
+
+
+# Target unit: display suffix (same spellings as project.format_temperature)
+SUFFIXES = {
+    'celsius': '°C',
+    'fahrenheit': '°F',
+    'kelvin': 'K',
+}
+
+
+def _check_unit(unit):
+    if unit not in SUFFIXES:
+        raise ValueError(f"Invalid unit: {unit}")
+
+
+def convert_temperatures(values, unit="celsius", from_unit="kelvin"):
+    """
+    Convert many temperatures in one pass
+    
+    Uses the same arithmetic, in the same order, as format_temperature and
+    WeatherRecord.temp_kelvin, so results match the scalar paths exactly.
+    
+    Args:
+        values (iterable): Temperatures (array('d'), NumPy array, list, ...)
+        unit (str): Target unit - 'celsius', 'fahrenheit', or 'kelvin'
+        from_unit (str): Unit of the input - 'kelvin' (API default) or 'celsius'
+            (what WeatherRecord and the observation store hold)
+        
+    Returns:
+        array: Converted values ('d')
+        
+    Raises:
+        ValueError: If invalid unit specified
+    """
+    _check_unit(unit)
+    if from_unit not in ('kelvin', 'celsius'):
+        raise ValueError(f"Invalid unit: {from_unit}")
+    
+    if np is not None:
+        return to_array(_convert(_as_ndarray(values), unit, from_unit))
+    
+    if not isinstance(values, array):
+        values = array('d', values)
+    return _convert_python(values, unit, from_unit)
+
+
+def _convert(values, unit, from_unit):
+    """Vectorized conversion of a float64 ndarray (or, in the fallback, one float)"""
+    if from_unit == unit:
+        return values
+    if unit == 'kelvin':
+        return values + 273.15
+    celsius = values - 273.15 if from_unit == 'kelvin' else values
+    if unit == 'fahrenheit':
+        return celsius * 9 / 5 + 32
+    return celsius
+
+
+def _convert_python(values, unit, from_unit):
+    if from_unit == unit:
+        return array('d', values)
+    if unit == 'kelvin':
+        return array('d', [v + 273.15 for v in values])
+    if unit == 'celsius':
+        return array('d', [v - 273.15 for v in values])
+    if from_unit == 'kelvin':
+        return array('d', [(v - 273.15) * 9 / 5 + 32 for v in values])
+    return array('d', [v * 9 / 5 + 32 for v in values])
+
+
+def format_temperatures(values, unit="celsius", from_unit="kelvin", decimals=1):
+    """
+    Convert and format many temperatures, e.g. for exports
+    
+    Output strings are identical to format_temperature's for the same input.
+    
+    Args:
+        values (iterable): Temperatures
+        unit (str): Target unit - 'celsius', 'fahrenheit', or 'kelvin'
+        from_unit (str): Unit of the input - 'kelvin' or 'celsius'
+        decimals (int): Digits after the decimal point
+        
+    Returns:
+        list: Formatted strings (e.g. ["25.0°C", ...])
+        
+    Raises:
+        ValueError: If invalid unit specified
+    """
+    _check_unit(unit)
+    if from_unit not in ('kelvin', 'celsius'):
+        raise ValueError(f"Invalid unit: {from_unit}")
+    
+    template = f"%.{decimals}f{SUFFIXES[unit]}"
+    if np is None:
+        # One format string bound once; map keeps the loop in C
+        return list(map(template.__mod__, convert_temperatures(values, unit, from_unit)))
+    
+    return _format_ndarray(_convert(_as_ndarray(values), unit, from_unit), template, decimals)
+
+
+# Widest tick range (in units of the last decimal) formatted from a lookup table
+_MAX_TABLE = 1 << 20
+
+
+def _format_ndarray(converted, template, decimals):
+    """
+    Format float64 values by rounding to ticks and looking each tick up in a
+    table of preformatted strings
+    
+    Readings span a narrow range, so a few thousand distinct strings cover
+    millions of values. Values where tick rounding could disagree with
+    printf-style rounding (near a half tick, -0.0, NaN/inf) are formatted
+    directly, so the output always matches template % value. Huge and
+    non-finite values also take the direct path.
+    """
+    if not len(converted):
+        return []
+    
+    scale = 10.0 ** decimals
+    scaled = converted * scale
+    ticks = np.rint(scaled)
+    with np.errstate(invalid='ignore'):
+        safe = ((np.abs(scaled) < 1e15)
+                & (np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) > 1e-6)
+                & ~((ticks == 0) & np.signbit(converted)))
+    if not safe.any():
+        return list(map(template.__mod__, converted.tolist()))
+    
+    low = int(ticks[safe].min())
+    high = int(ticks[safe].max())
+    if high - low >= _MAX_TABLE:
+        return list(map(template.__mod__, converted.tolist()))
+    
+    table = [template % (tick / scale) for tick in range(low, high + 1)]
+    offsets = np.where(safe, ticks - low, 0).astype(np.intp).tolist()
+    result = list(map(table.__getitem__, offsets))
+    
+    for i in np.flatnonzero(~safe).tolist():
+        result[i] = template % float(converted[i])
+    return result
+
+
+def _as_ndarray(values):
+    """View an array('d') or ndarray as float64 without copying; copy anything else"""
+    if isinstance(values, array) and values.typecode == 'd':
+        return np.frombuffer(values, dtype=np.float64) if len(values) else np.empty(0)
+    return np.asarray(values, dtype=np.float64)
+
+
+def to_array(values):
+    """
+    Copy a NumPy array into an array('d') without a Python loop
+    
+    Shared with forecast; float64 input that is already contiguous is not
+    copied twice.
+    
+    Args:
+        values (numpy.ndarray): Numeric values
+        
+    Returns:
+        array: Values as array('d')
+    """
+    result = array('d')
+    result.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return result
@@ -3,24 +3,49 @@ Weather API interaction module
 Handles all communication with OpenWeatherMap API
 """
 
-import requests
-from datetime import datetime
-from config import API_KEY, BASE_URL, TIMEOUT
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from cache import make_key
+from cities import city_key, group_cities
+from city_index import get_default_index
+from forecast import Forecast
+from weather_client import WeatherClient, SessionTransport
+import config
+import metrics
+from config import BATCH_WORKERS, GROUP_SIZE
 
 
-class WeatherAPI:
+class WeatherAPI(WeatherClient):
     """Class to handle weather API interactions"""
     
-    def __init__(self, api_key=API_KEY):
+    def __init__(self, api_key=None, session=None, cache=None, retry=None, breaker=None, store=None,
+                 transport=None, city_index=None):
         """
         Initialize WeatherAPI with API key
         
         Args:
-            api_key (str): OpenWeatherMap API key
+            api_key (str): OpenWeatherMap API key (defaults to config.API_KEY)
+            session (requests.Session): Session to send requests on
+                (defaults to the shared pooled session)
+            cache (TTLCache): Response cache (defaults to the shared cache;
+                pass False to disable caching)
+            retry (RetryPolicy): Backoff for transient failures (defaults from config)
+            breaker (CircuitBreaker): Breaker guarding the upstream
+                (defaults to the shared OpenWeatherMap breaker)
+            store (ObservationStore): History to record fetched observations in
+                (defaults to the configured store, if any; pass False to disable)
+            transport: Blocking transport (see weather_client); overrides session
+            city_index (CityIndex): Offline name-to-ID index that lets batch
+                lookups use group requests (defaults to config.CITY_LIST_PATH,
+                if set; pass False to disable)
         """
-        self.api_key = api_key
-        self.base_url = BASE_URL
-        
+        super().__init__(api_key, transport or SessionTransport(session), cache, retry, breaker, store)
+        self.forecast_url = config.FORECAST_URL
+        self.session = session
+        if city_index is False:
+            self.city_index = None
+        else:
+            self.city_index = city_index if city_index is not None else get_default_index()
+    
     def fetch_current_weather(self, city):
         """
         Fetch current weather for a city
@@ -29,68 +54,139 @@ class WeatherAPI:
             city (str): City name
             
         Returns:
-            dict: Parsed weather data
+            WeatherRecord: Parsed weather data (also readable as a dict)
             
         Raises:
             ValueError: If city not found or API error
             requests.RequestException: If network error
         """
-        if not self.api_key:
-            raise ValueError("API key not configured")
+        return self.fetch_current(city)
+    
+    def fetch_forecast(self, city):
+        """
+        Fetch the 5-day forecast in 3-hour steps for a city
         
-        params = {
-            'q': city,
-            'appid': self.api_key,
-            'units': 'metric'  # Get data in Celsius
-        }
+        Args:
+            city (str): City name
+            
+        Returns:
+            Forecast: Columnar series; call .daily() for per-day rollups
+            
+        Raises:
+            ValueError: If city not found or API error
+            requests.RequestException: If network error
+        """
+        params = self._params(city)
+        key = ('forecast',) + make_key(city, params['units'])
+        return self._flight.do(key, self._request_forecast, city, params)
+    
+    def _request_forecast(self, city, params):
+        """Send the forecast request for a city and parse it into columns"""
+        raw_data = self.get_json(self.forecast_url, params, city)
+        with metrics.stage('parse'):
+            return Forecast.from_api(raw_data)
+    
+    def iter_many(self, cities, max_workers=BATCH_WORKERS):
+        """
+        Fetch current weather for many cities concurrently
         
-        try:
-            response = requests.get(
-                self.base_url,
-                params=params,
-                timeout=TIMEOUT
-            )
+        At most max_workers requests are in flight at once, and cities are
+        pulled from the iterable only as slots free up, so arbitrarily long
+        inputs are processed in constant memory. With a city index, names it
+        resolves are fetched config.GROUP_SIZE at a time in group requests.
+        Lookups queue for rate-limit budget (config.RATE_LIMIT_BATCH_MAX_WAIT)
+        rather than failing once the per-call wait limit is reached, and
+        history is written config.HISTORY_BATCH_SIZE observations per commit.
+        
+        Args:
+            cities (iterable): City names
+            max_workers (int): Maximum concurrent requests
             
-            if response.status_code == 404:
-                raise ValueError(f"City '{city}' not found")
-            elif response.status_code == 401:
-                raise ValueError("Invalid API key")
+        Yields:
+            tuple: (city, weather_data, error) in completion order; exactly
+                one of weather_data and error is None
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        
+        tasks = self._batch_tasks(cities)
+        # History is written in batches once the workers are done (see _batch)
+        with self._batch(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
             
-            response.raise_for_status()
+            for fn, args in tasks:
+                pending.add(executor.submit(fn, *args))
+                if len(pending) >= max_workers:
+                    break
             
-            return self._parse_weather_data(response.json())
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+                
+                for fn, args in tasks:
+                    pending.add(executor.submit(fn, *args))
+                    if len(pending) >= max_workers:
+                        break
+    
+    def _batch_tasks(self, cities):
+        """
+        Split cities into units of work for iter_many
+        
+        Yields:
+            tuple: (fn, args) where fn(*args) returns a list of
+                (city, weather_data, error)
+        """
+        group = []
+        for city in cities:
+            city_id = self.city_index.lookup(city) if self.city_index is not None else None
+            if city_id is None:
+                yield self._fetch_one, (city,)
+                continue
             
-        except requests.HTTPError as e:
-            if e.response.status_code == 404:
-                raise ValueError(f"City '{city}' not found")
-            elif e.response.status_code == 401:
-                raise ValueError("Invalid API key")
-            else:
-                raise ValueError(f"API error: {e}")
+            group.append((city, city_id))
+            if len(group) == GROUP_SIZE:
+                yield self._fetch_group_of, (group,)
+                group = []
         
-    def _parse_weather_data(self, raw_data):
+        if group:
+            yield self._fetch_group_of, (group,)
+    
+    def _fetch_one(self, city):
+        try:
+            return [(city, self.fetch_current(city, config.RATE_LIMIT_BATCH_MAX_WAIT), None)]
+        except Exception as e:
+            return [(city, None, e)]
+    
+    def _fetch_group_of(self, pairs):
+        cities, city_ids = zip(*pairs)
+        return self.fetch_group(list(cities), list(city_ids), config.RATE_LIMIT_BATCH_MAX_WAIT)
+    
+    def fetch_many(self, cities, max_workers=BATCH_WORKERS):
         """
-        Parse raw API response into usable format
+        Fetch current weather for a list of cities concurrently
+        
+        A failing city does not fail the batch; its exception is returned
+        in the errors dict instead.
         
         Args:
-            raw_data (dict): Raw JSON response from API
+            cities (iterable): City names; spellings of the same city (case,
+                whitespace, Unicode composition) are fetched once
+            max_workers (int): Maximum concurrent lookups
             
         Returns:
-            dict: Parsed weather data
+            tuple: (results, errors) dicts keyed by city name as given
         """
-        return {
-            'city': raw_data['name'],
-            'country': raw_data['sys']['country'],
-            'temperature': f"{raw_data['main']['temp']:.1f}°C",
-            'feels_like': f"{raw_data['main']['feels_like']:.1f}°C",
-            'temp_kelvin': raw_data['main']['temp'] + 273.15,
-            'description': raw_data['weather'][0]['description'],
-            'icon': raw_data['weather'][0]['icon'],  # e.g., '01d' (day) or '01n' (night)
-            'humidity': raw_data['main']['humidity'],
-            'pressure': raw_data['main']['pressure'],
-            'wind_speed': raw_data['wind']['speed'],
-            'timestamp': datetime.fromtimestamp(raw_data['dt']).strftime('%Y-%m-%d %H:%M:%S')
-        }
+        results = {}
+        errors = {}
+        groups = group_cities(cities)
+        
+        for city, data, error in self.iter_many([names[0] for names in groups.values()], max_workers):
+            target = results if error is None else errors
+            for name in groups[city_key(city)]:
+                target[name] = data if error is None else error
+        
+        return results, errors
     
     def get_weather_emoji(self, description):
         """
@@ -0,0 +1,571 @@
+"""
+Weather client core module
+Single request/status/parse path shared by every weather lookup, with
+pluggable transports and caches
+"""
+
+import asyncio
+import inspect
+import json
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from operator import attrgetter
+import requests
+import http_pool
+import json_codec
+import metrics
+from cache import TieredCache, get_default_cache, make_key
+from cities import normalize_city
+from coalesce import SingleFlight, AsyncSingleFlight
+from rate_limit import get_rate_limiter
+from retry import RetryPolicy, call_with_retry, async_call_with_retry, get_circuit_breaker
+from models import WeatherRecord
+from observation_store import get_default_store
+import config
+from config import BASE_URL, TIMEOUT, HISTORY_BATCH_SIZE
+
+
+# What every transport returns for one request: the HTTP status, the decoded
+# JSON body (None for error statuses) and the Retry-After header, if any
+Reply = namedtuple('Reply', ['status', 'data', 'retry_after'])
+
+_status_of = attrgetter('status')
+_retry_after_of = attrgetter('retry_after')
+
+
+class SessionTransport:
+    """Blocking transport over a pooled requests session"""
+    
+    # Exception types treated as transient network failures
+    retry_on = (requests.Timeout, requests.ConnectionError)
+    
+    def __init__(self, session=None, timeout=TIMEOUT):
+        """
+        Initialize the transport
+        
+        Args:
+            session (requests.Session): Session to send requests on
+                (defaults to the shared pooled session)
+            timeout (float): Per-request timeout in seconds
+        """
+        self.session = session
+        self.timeout = timeout
+    
+    def _get_session(self):
+        return self.session or http_pool.get_session()
+    
+    def get(self, url, params):
+        """
+        Send one GET request
+        
+        Args:
+            url (str): Endpoint URL
+            params (dict): Query parameters
+            
+        Returns:
+            Reply: Status, decoded body and Retry-After
+        """
+        response = self._get_session().get(url, params=params, timeout=self.timeout)
+        if response.status_code >= 400:
+            return Reply(response.status_code, None, response.headers.get('Retry-After'))
+        if metrics.enabled:
+            # requests stops the clock once the headers are in, before the body
+            metrics.observe_stage('ttfb', response.elapsed.total_seconds())
+        # Decode the raw bytes rather than response.json(), which builds the
+        # text first and always uses the stdlib decoder
+        return Reply(response.status_code, json_codec.loads(response.content), None)
+
+
+class BlockingTransport(SessionTransport):
+    """Blocking transport that opens a fresh connection for every request"""
+    
+    def __init__(self, timeout=TIMEOUT):
+        super().__init__(timeout=timeout)
+    
+    def _get_session(self):
+        return requests
+
+
+def _fixture_key(url, city):
+    """Key a recorded response by endpoint name and normalized city"""
+    return f"{url.rstrip('/').rsplit('/', 1)[-1]}:{make_key(city)[0]}"
+
+
+def _request_key(url, params):
+    """Fixture key for a request by name (q) or, for group requests, by IDs"""
+    return _fixture_key(url, params.get('q') or params['id'])
+
+
+class ReplayTransport:
+    """Transport that answers from recorded responses without touching the network"""
+    
+    retry_on = ()
+    
+    def __init__(self, responses):
+        """
+        Initialize the transport
+        
+        Args:
+            responses (dict): Recorded bodies keyed by city name (current
+                weather) or 'endpoint:city' (e.g. 'forecast:london'); values are
+                either a JSON body or a (status, body) pair. Unknown cities get a 404.
+        """
+        self.responses = {}
+        for key, value in responses.items():
+            endpoint, _, city = key.rpartition(':')
+            status, body = value if isinstance(value, (tuple, list)) else (200, value)
+            self.responses[_fixture_key(endpoint or BASE_URL, city)] = (status, body)
+        self.calls = 0
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load recorded responses saved by RecordingTransport.save
+        
+        Args:
+            path (str): JSON fixture file
+            
+        Returns:
+            ReplayTransport: Transport replaying the file
+        """
+        with open(path, encoding='utf-8') as f:
+            recorded = json.load(f)
+        return cls({key: (entry['status'], entry['body']) for key, entry in recorded.items()})
+    
+    def get(self, url, params):
+        self.calls += 1
+        status, body = self.responses.get(_request_key(url, params), (404, None))
+        return Reply(status, body if status < 400 else None, None)
+
+
+class RecordingTransport:
+    """Transport wrapper that records every reply for later replay"""
+    
+    def __init__(self, transport):
+        """
+        Initialize the recorder
+        
+        Args:
+            transport: Blocking transport to forward requests to
+        """
+        self.transport = transport
+        self.retry_on = transport.retry_on
+        self.recorded = {}
+    
+    def get(self, url, params):
+        reply = self.transport.get(url, params)
+        self.recorded[_request_key(url, params)] = {'status': reply.status, 'body': reply.data}
+        return reply
+    
+    def save(self, path):
+        """
+        Write the recorded replies as a fixture file for ReplayTransport.load
+        
+        Args:
+            path (str): Destination JSON file
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.recorded, f, indent=2, sort_keys=True)
+
+
+def check_status(status, city):
+    """
+    Map an error status to the exception callers see
+    
+    Args:
+        status (int): HTTP status of the final attempt
+        city (str): City name, for error messages
+        
+    Raises:
+        ValueError: If city not found or API error
+    """
+    if status == 404:
+        raise ValueError(f"City '{city}' not found")
+    elif status == 401:
+        raise ValueError("Invalid API key")
+    elif status >= 400:
+        raise ValueError(f"API error: {status} for city '{city}'")
+
+
+def _counted(cached):
+    """Count a cache lookup as a hit or miss (while metrics are enabled)"""
+    if metrics.enabled:
+        metrics.inc('weather_cache_hits_total' if cached is not None else 'weather_cache_misses_total')
+    return cached
+
+
+class WeatherClient:
+    """Transport-agnostic weather client: caching, coalescing, retries and parsing"""
+    
+    def __init__(self, api_key=None, transport=None, cache=None, retry=None, breaker=None, store=None):
+        """
+        Initialize the client
+        
+        Args:
+            api_key (str): OpenWeatherMap API key (defaults to config.API_KEY)
+            transport: Object whose get(url, params) returns (or, for async
+                transports, awaits to) a Reply (defaults to SessionTransport)
+            cache (TTLCache): Response cache (defaults to the shared cache;
+                pass False to disable caching)
+            retry (RetryPolicy): Backoff for transient failures (defaults from config)
+            breaker (CircuitBreaker): Breaker guarding the upstream
+                (defaults to the shared OpenWeatherMap breaker)
+            store (ObservationStore): History to record fetched observations in
+                (defaults to the configured store, if any; pass False to disable)
+        """
+        self.api_key = config.API_KEY if api_key is None else api_key
+        self.base_url = config.BASE_URL
+        self.group_url = config.GROUP_URL
+        self.transport = transport or SessionTransport()
+        self.cache = None if cache is False else (cache if cache is not None else get_default_cache())
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or get_circuit_breaker()
+        self.store = None if store is False else (store if store is not None else get_default_store())
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._history = []
+        self._history_lock = threading.Lock()
+        self._batches = 0
+    
+    def _params(self, city):
+        """Build query parameters for a city"""
+        return self._query(q=normalize_city(city))
+    
+    def _query(self, **fields):
+        """Build query parameters: the given fields plus key and units"""
+        if not self.api_key:
+            raise ValueError("API key not configured")
+        
+        return {
+            **fields,
+            'appid': self.api_key,
+            'units': 'metric'  # Get data in Celsius
+        }
+    
+    def _cached(self, key):
+        if self.cache is None:
+            return None
+        return _counted(self.cache.get(key))
+    
+    async def _cached_async(self, key):
+        """Like _cached, but a disk tier (see TieredCache) is read from a worker thread"""
+        if not isinstance(self.cache, TieredCache):
+            return self._cached(key)
+        cached = self.cache.memory.get(key)
+        if cached is None:
+            cached = await asyncio.to_thread(self.cache.disk_get, key)
+        return _counted(cached)
+    
+    def _keep(self, key, weather_data):
+        """Cache and record a freshly parsed observation"""
+        self._keep_cached(key, weather_data)
+        self._write_history(self._record(weather_data))
+        return weather_data
+    
+    def _record(self, weather_data):
+        """
+        Buffer an observation for the history store
+        
+        Outside a batch every observation is written straight away; during
+        one they are written HISTORY_BATCH_SIZE at a time.
+        
+        Returns:
+            list: Observations the caller should write now (often empty)
+        """
+        if self.store is None:
+            return []
+        with self._history_lock:
+            self._history.append(weather_data)
+            if self._batches and len(self._history) < HISTORY_BATCH_SIZE:
+                return []
+            pending, self._history = self._history, []
+        return pending
+    
+    def _write_history(self, pending):
+        if pending:
+            self.store.append_many(pending)
+    
+    def _take_history(self):
+        with self._history_lock:
+            pending, self._history = self._history, []
+        return pending
+    
+    def flush_history(self):
+        """Write any buffered observations to the history store"""
+        self._write_history(self._take_history())
+    
+    async def flush_history_async(self):
+        """Write buffered observations from a worker thread, off the event loop"""
+        pending = self._take_history()
+        if pending:
+            await asyncio.to_thread(self.store.append_many, pending)
+    
+    def _begin_batch(self):
+        with self._history_lock:
+            self._batches += 1
+    
+    def _end_batch(self):
+        with self._history_lock:
+            self._batches -= 1
+    
+    @contextmanager
+    def _batch(self):
+        """Buffer history writes while a batch runs, then flush them"""
+        self._begin_batch()
+        try:
+            yield
+        finally:
+            self._end_batch()
+            self.flush_history()
+    
+    def _keep_cached(self, key, weather_data):
+        if self.cache is not None:
+            self.cache.set(key, weather_data)
+        return weather_data
+    
+    async def _keep_cached_async(self, key, weather_data):
+        if not isinstance(self.cache, TieredCache):
+            return self._keep_cached(key, weather_data)
+        self.cache.memory.set(key, weather_data)
+        await asyncio.to_thread(self.cache.disk.set, key, weather_data)
+        return weather_data
+    
+    def fetch_current(self, city, max_wait=None):
+        """
+        Fetch current weather for a city
+        
+        Args:
+            city (str): City name
+            max_wait (float): Longest wait for rate-limit budget (defaults to
+                config.RATE_LIMIT_MAX_WAIT)
+            
+        Returns:
+            WeatherRecord: Parsed weather data (also readable as a dict)
+            
+        Raises:
+            ValueError: If city not found or API error
+            requests.RequestException: If network error
+        """
+        params = self._params(city)
+        key = make_key(city, params['units'])
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        
+        # Concurrent lookups for the same city share one upstream request
+        return self._flight.do(key, self._request_current, city, params, key, max_wait)
+    
+    def _request_current(self, city, params, key, max_wait=None):
+        """Send the API request for a city and cache the parsed result"""
+        raw_data = self.get_json(self.base_url, params, city, max_wait)
+        return self._keep(key, self._parse_weather_data(raw_data))
+    
+    def get_json(self, url, params, city, max_wait=None):
+        """
+        Send a rate-limited, retried GET and decode the JSON body
+        
+        Args:
+            url (str): Endpoint URL
+            params (dict): Query parameters
+            city (str): City name, for error messages
+            max_wait (float): Longest wait for rate-limit budget (defaults to
+                config.RATE_LIMIT_MAX_WAIT)
+            
+        Returns:
+            dict: Decoded JSON response
+            
+        Raises:
+            ValueError: If city not found or API error
+            requests.RequestException: If network error
+        """
+        limiter = get_rate_limiter(self.api_key)
+        
+        def send():
+            limiter.acquire(max_wait)
+            return self.transport.get(url, params)
+        
+        # Timeouts, 429s and 5xx are retried; the final reply falls through
+        # to the normal status handling
+        reply = call_with_retry(
+            send, self.retry, self.breaker,
+            retry_on=self.transport.retry_on,
+            status_of=_status_of,
+            retry_after_of=_retry_after_of
+        )
+        check_status(reply.status, city)
+        return reply.data
+    
+    def fetch_group(self, cities, city_ids, max_wait=None):
+        """
+        Fetch current weather for several cities in one group request
+        
+        Cities already cached are answered from the cache; the rest share a
+        single /group request (one rate-limit token) by city ID.
+        
+        Args:
+            cities (list): City names, as given by the caller
+            city_ids (list): Matching OpenWeatherMap city IDs (at most
+                config.GROUP_SIZE distinct)
+            max_wait (float): Longest wait for rate-limit budget (defaults to
+                config.RATE_LIMIT_MAX_WAIT)
+            
+        Returns:
+            list: (city, weather_data, error) per city, in input order; exactly
+                one of weather_data and error is None
+        """
+        outcomes = {}
+        wanted = {}
+        for city, city_id in zip(cities, city_ids):
+            cached = self._cached(make_key(city))
+            if cached is not None:
+                outcomes[city] = (cached, None)
+            else:
+                wanted.setdefault(city_id, []).append(city)
+        
+        if wanted:
+            try:
+                params = self._query(id=','.join(map(str, wanted)))
+                label = ', '.join(names[0] for names in wanted.values())
+                raw_data = self.get_json(self.group_url, params, label, max_wait)
+            except Exception as e:
+                for names in wanted.values():
+                    for city in names:
+                        outcomes[city] = (None, e)
+            else:
+                entries = {entry.get('id'): entry for entry in raw_data.get('list', ())}
+                for city_id, names in wanted.items():
+                    entry = entries.get(city_id)
+                    if entry is None:
+                        for city in names:
+                            outcomes[city] = (None, ValueError(f"City '{city}' not found"))
+                        continue
+                    # A malformed entry only fails its own cities, as by name
+                    try:
+                        weather_data = self._parse_weather_data(entry)
+                        for city in names:
+                            outcomes[city] = (self._keep_cached(make_key(city), weather_data), None)
+                        self._write_history(self._record(weather_data))
+                    except Exception as e:
+                        for city in names:
+                            outcomes[city] = (None, e)
+        
+        return [(city,) + outcomes[city] for city in cities]
+    
+    async def fetch_current_async(self, city, max_wait=None):
+        """
+        Fetch current weather for a city without blocking the event loop
+        
+        Args:
+            city (str): City name
+            max_wait (float): Longest wait for rate-limit budget (defaults to
+                config.RATE_LIMIT_MAX_WAIT)
+            
+        Returns:
+            WeatherRecord: Parsed weather data (also readable as a dict)
+            
+        Raises:
+            ValueError: If city not found or API error
+        """
+        params = self._params(city)
+        key = make_key(city, params['units'])
+        cached = await self._cached_async(key)
+        if cached is not None:
+            return cached
+        
+        return await self._async_flight.do(key, self._request_current_async, city, params, key, max_wait)
+    
+    async def _request_current_async(self, city, params, key, max_wait=None):
+        data = await self.get_json_async(self.base_url, params, city, max_wait)
+        # SQLite calls block, so the disk cache and history are written from
+        # worker threads
+        weather_data = await self._keep_cached_async(key, self._parse_weather_data(data))
+        pending = self._record(weather_data)
+        if pending:
+            await asyncio.to_thread(self.store.append_many, pending)
+        return weather_data
+    
+    async def get_json_async(self, url, params, city, max_wait=None):
+        """
+        Await a rate-limited, retried GET and decode the JSON body
+        
+        Blocking transports (e.g. ReplayTransport) are called directly; async
+        transports return an awaitable.
+        
+        Args:
+            url (str): Endpoint URL
+            params (dict): Query parameters
+            city (str): City name, for error messages
+            max_wait (float): Longest wait for rate-limit budget (defaults to
+                config.RATE_LIMIT_MAX_WAIT)
+            
+        Returns:
+            dict: Decoded JSON response
+            
+        Raises:
+            ValueError: If city not found or API error
+        """
+        limiter = get_rate_limiter(self.api_key)
+        
+        async def send():
+            await limiter.acquire_async(max_wait)
+            reply = self.transport.get(url, params)
+            if inspect.isawaitable(reply):
+                reply = await reply
+            return reply
+        
+        reply = await async_call_with_retry(
+            send, self.retry, self.breaker,
+            retry_on=self.transport.retry_on,
+            status_of=_status_of,
+            retry_after_of=_retry_after_of
+        )
+        check_status(reply.status, city)
+        return reply.data
+    
+    def _parse_weather_data(self, raw_data):
+        """
+        Parse raw API response into usable format
+        
+        Args:
+            raw_data (dict): Raw JSON response from API
+            
+        Returns:
+            WeatherRecord: Parsed weather data (also readable as a dict)
+        """
+        with metrics.stage('parse'):
+            return WeatherRecord.from_api(raw_data)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_default_client(api_key=None):
+    """
+    Get the client shared by every caller using an API key
+    
+    Sharing one client means concurrent lookups of the same city share one
+    upstream request (see coalesce.SingleFlight).
+    
+    Args:
+        api_key (str): OpenWeatherMap API key (defaults to config.API_KEY)
+        
+    Returns:
+        WeatherClient: Client built with the default transport, cache, store
+            and config.BASE_URL on first use
+    """
+    key = (config.API_KEY if api_key is None else api_key, config.BASE_URL)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = WeatherClient(key[0])
+    return client
+
+
+def reset_default_clients():
+    """Forget all shared clients so they are rebuilt from config"""
+    with _clients_lock:
+        _clients.clear()